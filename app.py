@@ -1,362 +1,857 @@
-from flask import Flask, render_template, request # type: ignore
+from flask import Flask, render_template, request, jsonify # type: ignore
 import pandas as pd
 import numpy as np
-from helpers import format_angka_tampilan
+import os
+import threading
+import time
+from helpers import format_angka_tampilan, format_angka_tampilan_batch, format_rupiah_batch, hitung_bintang_rating
+import mcdm
+import instrumentation
+from instrumentation import stage
+import geo
+import precompute
+import search
+from dataset import build_dataset_store, dataset_fingerprint, load_coordinates, load_dataset_fast, place_positions
+
+_startup_started = time.perf_counter()
 
 # Inisialisasi aplikasi Flask
 app = Flask(__name__)
+instrumentation.init_app(app)
 
 # --- Memuat dan Membersihkan Data ---
+# Lihat dataset.py; snapshot kolumnar dipakai bila tersedia dan masih segar.
 try:
-    df = pd.read_csv('tourism_data_updated.csv')
-    print("File 'tourism_data_updated.csv' berhasil dimuat.")
-
-    # Konversi 'yes'/'no' ke 1/0 untuk kolom fasilitas
-    if 'Toilet_Availability' in df.columns:
-        df['Toilet_Availability_Display'] = df['Toilet_Availability'].astype(str).str.lower()
-        df['Toilet_Availability'] = df['Toilet_Availability'].astype(str).str.lower().map({'yes': 1, 'no': 0}).fillna(0)
-    else:
-        print("WARNING: Column 'Toilet_Availability' not found.")
-        df['Toilet_Availability'] = 0
-        df['Toilet_Availability_Display'] = 'no'
-
-    if 'Parking_Availability' in df.columns:
-        df['Parking_Availability_Display'] = df['Parking_Availability'].astype(str).str.lower()
-        df['Parking_Availability'] = df['Parking_Availability'].astype(str).str.lower().map({'yes': 1, 'no': 0}).fillna(0)
-    else:
-        print("WARNING: Column 'Parking_Availability' not found.")
-        df['Parking_Availability'] = 0
-        df['Parking_Availability_Display'] = 'no'
-
-    # Pastikan kolom numerik utama adalah numerik dan NaN diisi
-    for col_name, default_val in [
-        ('Accessibility_Score', 5), 
-        ('Price', df['Price'].median() if 'Price' in df.columns and not df['Price'].empty else 0), 
-        ('Rating', df['Rating'].mean() if 'Rating' in df.columns and not df['Rating'].empty else 3),
-        ('Time_Minutes', df['Time_Minutes'].mean() if 'Time_Minutes' in df.columns and not df['Time_Minutes'].empty else 60) # Kembalikan Time_Minutes
-    ]:
-        if col_name in df.columns:
-            df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
-            if df[col_name].isnull().any():
-                fill_value = default_val if pd.isna(default_val) or not callable(default_val) else default_val() # Handle jika default adalah fungsi
-                df[col_name] = df[col_name].fillna(fill_value)
-        else:
-            print(f"WARNING: Column '{col_name}' not found. Using default value: {default_val}")
-            df[col_name] = default_val
-
-
+    df, DATASET_SOURCE = load_dataset_fast()
     CITIES = ['All'] + sorted(df['City'].unique().tolist())
 except FileNotFoundError:
     print("ERROR: File 'tourism_data_updated.csv' not found. Make sure it's in the same folder as app.py.")
     df = pd.DataFrame() # Buat DataFrame kosong agar aplikasi tidak crash total
     CITIES = ['All']
+    DATASET_SOURCE = None
 except Exception as e:
     print(f"An error occurred during data loading: {e}")
     df = pd.DataFrame()
     CITIES = ['All']
+    DATASET_SOURCE = None
+DATASET_VERSION = dataset_fingerprint()
 
 
 # --- Fungsi CRITIC dan VIKOR ---
-def critic_weight(data):
-    epsilon = 1e-9 
-    numeric_data = data.apply(pd.to_numeric, errors='coerce').dropna()
-    if len(numeric_data) <= 1:
-        if not data.columns.empty:
-            return pd.Series([1/len(data.columns)] * len(data.columns), index=data.columns)
-        else:
-            return pd.Series([])
-
-    min_vals = numeric_data.min()
-    max_vals = numeric_data.max()
-    range_vals = max_vals - min_vals
-    
-    normalized_data = pd.DataFrame(index=numeric_data.index, columns=numeric_data.columns, dtype=float)
+# Pembungkus tipis di atas mcdm.py: menerima/mengembalikan objek pandas,
+# perhitungannya sendiri dilakukan sekaligus pada ndarray.
+def _criteria_matrix(data):
+    """Mengubah DataFrame kriteria menjadi matriks float tanpa baris NaN beserta mask baris yang valid."""
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes):
+        values = data.to_numpy(dtype=float)
+    else:
+        values = data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    valid_rows = ~np.isnan(values).any(axis=1)
+    return values[valid_rows], valid_rows
 
-    for col in numeric_data.columns:
-        if range_vals[col] == 0: # Semua nilai sama
-            normalized_data[col] = 0.0 # Atau 0.5 jika diinginkan
-        else:
-            normalized_data[col] = (numeric_data[col] - min_vals[col]) / (range_vals[col] + epsilon)
-    
-    std_dev = normalized_data.std()
-    
-    corr_matrix = normalized_data.corr() 
-    diff_corr = 1 - corr_matrix 
-    c_j = std_dev * diff_corr.sum() 
-    
-    if c_j.sum() == 0:
-        if not data.columns.empty:
-            return pd.Series([1/len(data.columns)] * len(data.columns), index=data.columns)
-        else:
-            return pd.Series([])
-        
-    weights = c_j / c_j.sum() 
-    return weights
-
-def vikor_method(data, weights, benefit_cols): 
-    epsilon = 1e-9 
-    numeric_data = data.apply(pd.to_numeric, errors='coerce').dropna()
-    
-    if numeric_data.empty:
+def critic_weight(data):
+    if data.columns.empty:
+        return pd.Series([])
+    values, _ = _criteria_matrix(data)
+    if len(values) <= 1:
+        return pd.Series([1/len(data.columns)] * len(data.columns), index=data.columns)
+    return pd.Series(mcdm.critic_weights(values), index=data.columns)
+
+def vikor_method(data, weights, benefit_cols, v=0.5): 
+    values, valid_rows = _criteria_matrix(data)
+    if len(values) == 0:
         return pd.Series([])
 
-    min_vals = numeric_data.min()
-    max_vals = numeric_data.max()
-    range_vals = max_vals - min_vals
-    normalized_data = pd.DataFrame(index=numeric_data.index, columns=numeric_data.columns, dtype=float)
-    for col in numeric_data.columns:
-        if range_vals[col] == 0:
-            normalized_data[col] = 0.0
-        else:
-            normalized_data[col] = (numeric_data[col] - min_vals[col]) / (range_vals[col] + epsilon)
-
-    ideal_positive = pd.Series(index=numeric_data.columns, dtype='float64')
-    ideal_negative = pd.Series(index=numeric_data.columns, dtype='float64')
-    for col in numeric_data.columns:
-        if col in benefit_cols: 
-            ideal_positive[col] = normalized_data[col].max() 
-            ideal_negative[col] = normalized_data[col].min() 
-        else: # Cost criteria
-            ideal_positive[col] = normalized_data[col].min() 
-            ideal_negative[col] = normalized_data[col].max() 
-    
     if not isinstance(weights, pd.Series):
-        weights = pd.Series(weights, index=numeric_data.columns)
-    elif not weights.index.equals(numeric_data.columns):
-        weights = weights.reindex(numeric_data.columns).fillna(0)
-
-    weighted_normalized = normalized_data.multiply(weights, axis='columns') 
-    
-    s_values = pd.Series(0.0, index=numeric_data.index)
-    r_values = pd.Series(0.0, index=numeric_data.index)
-
-    for col in numeric_data.columns:
-        term = weights[col] * ( (ideal_positive[col] - normalized_data[col]).abs() )
-        s_values += term
-        r_values = np.maximum(r_values, term)
-
-    s_star, s_minus = s_values.min(), s_values.max()
-    r_star, r_minus = r_values.min(), r_values.max()
-    
-    s_diff = s_minus - s_star
-    r_diff = r_minus - r_star
-    
-    q_s_component = ((s_values - s_star) / (s_diff + epsilon))
-    q_r_component = ((r_values - r_star) / (r_diff + epsilon))
-    
-    v = 0.5 # Bobot untuk strategi mayoritas, bisa disesuaikan
-    q_values = v * q_s_component + (1 - v) * q_r_component
-    
-    return q_values.sort_values()
+        weights = np.asarray(weights, dtype=float)
+    else:
+        weights = weights.reindex(data.columns).fillna(0).to_numpy(dtype=float)
+
+    benefit_mask = data.columns.isin(benefit_cols)
+    q_values = mcdm.vikor_scores(values, weights, benefit_mask, v=v).q # v = bobot strategi mayoritas
+
+    return pd.Series(q_values, index=data.index[valid_rows]).sort_values()
+
+
+# --- Kriteria ---
+CRITERIA = ['Price', 'Rating', 'Accessibility_Score', 'Toilet_Availability', 'Parking_Availability', 'Time_Minutes']
+
+# Time_Minutes dianggap sebagai BENEFIT (semakin lama semakin bagus)
+BENEFIT_CRITERIA = ['Rating', 'Accessibility_Score', 'Toilet_Availability', 'Parking_Availability', 'Time_Minutes']
+
+VIKOR_V = 0.5
+
+# Paginasi hasil ranking kota
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Analisis sensitivitas: grid v dari 0 sampai 1 x (bobot CRITIC + perturbasi Monte-Carlo)
+DEFAULT_SENSITIVITY_V_STEPS = 11
+DEFAULT_SENSITIVITY_PERTURBATIONS = 99
+DEFAULT_SENSITIVITY_SPREAD = 0.2
+DEFAULT_SENSITIVITY_TOP_K = 10
+MAX_SENSITIVITY_V_STEPS = 101
+MAX_SENSITIVITY_SCENARIOS = 10000
+
+# Ranking semua kota dihitung saat startup; DESTINA_WARM_CACHE=0 melewatinya (mis. precompute.py
+# yang menghitung sendiri dengan process pool). Cache tetap terisi saat request pertama.
+WARM_CACHE_ON_STARTUP = os.environ.get('DESTINA_WARM_CACHE', '1') != '0'
+
+# Ranking "di dekat saya": jarak (km) dari titik pengguna bisa ditambahkan sebagai kriteria COST
+DISTANCE_CRITERION = 'Distance_Km'
+DEFAULT_NEARBY_RADIUS_KM = 10
+MAX_NEARBY_RADIUS_KM = 20000
+
+# Pencarian kata kunci: skor BM25 bisa ditambahkan sebagai kriteria BENEFIT
+RELEVANCE_CRITERION = 'Text_Relevance'
+MAX_SEARCH_QUERY_LENGTH = 200
+
+
+# --- Cache Ranking per Kota ---
+# Kunci: (kota, kriteria, kriteria benefit, v). Isi cache hanya valid untuk DATASET_VERSION
+# yang sedang dimuat; begitu sidik jari CSV berubah, dataset dimuat ulang dan cache dikosongkan.
+_ranking_cache = {}
+_ranking_cache_lock = threading.Lock()
+_overall_base = None # Basis evaluasi destinasi baru, lihat build_overall_base()
+_failed_dataset_version = None # Sidik jari CSV yang terakhir gagal dimuat ulang, lihat refresh_dataset_if_changed()
+
+def city_criteria_matrix(store, choice, criteria=CRITERIA):
+    """
+    Posisi baris valid dan matriks kriteria untuk satu pilihan kota ('All' = semua kota).
+    Mengembalikan (positions, matrix), atau {'error': ...} jika data tidak mencukupi.
+    """
+    positions = store.city_rows.get(choice, np.empty(0, dtype=np.intp))
+
+    if len(positions) < 2:
+        return {'error': "Not enough data for comparison in this city/selection (minimum 2 destinations)."}
+
+    missing_criteria = [c for c in criteria if store.matrix is None or c not in store.criteria]
+    if missing_criteria:
+        return {'error': f"The following criteria columns are missing: {', '.join(missing_criteria)}. Please check the CSV file and data loading section in app.py."}
+
+    with stage('criteria_matrix', rows=len(positions)):
+        positions = positions[store.valid_rows[positions]] # Baris dengan NaN di kriteria PENTING dibuang
+        matrix = store.matrix
+        if tuple(criteria) != store.criteria:
+            matrix = matrix[:, [store.criteria.index(c) for c in criteria]]
+        if len(positions) != store.n_rows: # Seluruh dataset valid ('All') dipakai langsung tanpa salinan
+            matrix = matrix[positions]
+
+    if len(positions) < 2: # Cek lagi setelah dropna
+        return {'error': "Not enough valid data after cleaning (due to missing values in criteria columns) for comparison."}
+    return positions, matrix
+
+def compute_city_ranking(store, choice, criteria=CRITERIA, benefit_criteria=BENEFIT_CRITERIA, v=VIKOR_V):
+    """
+    Menjalankan CRITIC + VIKOR untuk satu pilihan kota ('All' = semua kota) di atas DatasetStore
+    read-only, tanpa menyalin DataFrame. Mengembalikan dict berisi 'positions' (posisi baris di
+    dataset), 'q' (nilai Q, belum diurutkan), 'weights' (teks tampilan) dan 'weight_values',
+    atau 'error' jika data tidak mencukupi. Pengurutan dan format tampilan dilakukan per halaman,
+    lihat select_ranking_page() dan format_ranked_rows(). 'store' mencatat DatasetStore asal posisi baris.
+    """
+    selection = city_criteria_matrix(store, choice, criteria)
+    if isinstance(selection, dict):
+        return selection
+    positions, matrix = selection
+
+    normalized = mcdm.normalize(matrix)
+    with stage('critic', rows=len(matrix)):
+        weights = mcdm.critic_weights_from_normalized(normalized)
+    with stage('vikor', rows=len(matrix)):
+        result = mcdm.vikor_from_normalized(normalized, weights, np.isin(criteria, benefit_criteria), v=v)
+    return _ranking_entry(store, positions, result.q, result.weights, criteria)
+
+def _ranking_entry(store, positions, q_values, weights, criteria=CRITERIA):
+    """Entri cache ranking: DatasetStore asal, posisi baris, nilai Q, bobot untuk tampilan dan bobot mentah."""
+    weights_dict_for_selection = dict(zip(criteria, format_angka_tampilan_batch(weights).tolist()))
+    return {'store': store, 'positions': positions, 'q': q_values, 'weights': weights_dict_for_selection, 'weight_values': weights}
+
+def compute_nearby_ranking(store, lat, lon, radius_km=None, k=None, include_distance=False):
+    """
+    CRITIC + VIKOR hanya untuk destinasi di sekitar (lat, lon): dalam radius_km, atau k terdekat
+    jika k diberikan. Kandidat dipilih lewat indeks spasial store.geo_index sehingga biayanya
+    mengikuti jumlah tetangga, bukan ukuran dataset. Dengan include_distance, jarak ikut dinilai
+    sebagai kriteria COST. Hasilnya berbentuk sama seperti compute_city_ranking() ditambah 'distances'.
+    """
+    if store.geo_index is None:
+        return {'error': "Destination coordinates are not available, so nearby search is disabled."}
+    if store.matrix is None:
+        return {'error': f"The following criteria columns are missing: {', '.join(c for c in CRITERIA if c not in store.criteria)}."}
+
+    with stage('geo_query', rows=len(store.geo_index.positions)):
+        if k is not None:
+            positions, distances = geo.query_nearest(store.geo_index, lat, lon, k)
+        else:
+            positions, distances = geo.query_radius(store.geo_index, lat, lon, radius_km)
+
+    return rank_candidates(store, positions, carried={'distances': distances},
+                           extra_criterion=(DISTANCE_CRITERION, 'distances', False) if include_distance else None,
+                           not_enough_error="Not enough destinations in this area for comparison (minimum 2). Try a larger radius.")
+
+def compute_search_ranking(store, index, query, choice='All', include_relevance=False):
+    """
+    CRITIC + VIKOR hanya untuk destinasi yang cocok dengan query teks (BM25, lihat search.py),
+    opsional dibatasi ke satu kota. Dengan include_relevance, skor BM25 ikut dinilai sebagai
+    kriteria BENEFIT. Hasilnya berbentuk sama seperti compute_city_ranking() ditambah 'relevance'.
+    """
+    if index is None:
+        return {'error': "The search index is not available, so keyword search is disabled."}
+    if store.matrix is None:
+        return {'error': f"The following criteria columns are missing: {', '.join(c for c in CRITERIA if c not in store.criteria)}."}
+
+    with stage('search', rows=len(index.place_ids)):
+        place_ids, relevance = search.search(index, query)
+        positions = place_positions(store, place_ids)
+        found = positions >= 0
+        if choice != 'All':
+            city_rows = store.city_rows.get(choice, np.empty(0, dtype=np.intp))
+            match = np.clip(np.searchsorted(city_rows, positions), 0, max(len(city_rows) - 1, 0))
+            found &= (city_rows[match] == positions) if len(city_rows) else False
+        positions, relevance = positions[found], relevance[found]
+
+    return rank_candidates(store, positions, carried={'relevance': relevance},
+                           extra_criterion=(RELEVANCE_CRITERION, 'relevance', True) if include_relevance else None,
+                           not_enough_error="Not enough destinations match this search for comparison (minimum 2). Try other keywords or all cities.")
+
+def rank_candidates(store, positions, carried=None, extra_criterion=None, not_enough_error=None):
+    """
+    CRITIC + VIKOR untuk subset baris `positions` dari DatasetStore. `carried` berisi array yang
+    sejajar dengan positions (mis. jarak) dan ikut disaring bersama baris yang valid.
+    `extra_criterion` = (nama, kunci di carried, benefit?) menambahkan salah satunya sebagai kriteria.
+    """
+    carried = carried or {}
+    with stage('criteria_matrix', rows=len(positions)):
+        valid = store.valid_rows[positions]
+        positions = positions[valid]
+        carried = {key: values[valid] for key, values in carried.items()}
+        matrix = store.matrix[positions]
+        criteria = list(store.criteria)
+        benefit_mask = np.isin(criteria, BENEFIT_CRITERIA)
+        if extra_criterion is not None:
+            name, key, is_benefit = extra_criterion
+            matrix = np.column_stack([matrix, carried[key]])
+            criteria.append(name)
+            benefit_mask = np.append(benefit_mask, is_benefit)
+
+    if len(positions) < 2:
+        return {'error': not_enough_error or "Not enough data for comparison (minimum 2 destinations)."}
+
+    normalized = mcdm.normalize(matrix)
+    with stage('critic', rows=len(matrix)):
+        weights = mcdm.critic_weights_from_normalized(normalized)
+    with stage('vikor', rows=len(matrix)):
+        result = mcdm.vikor_from_normalized(normalized, weights, benefit_mask, v=VIKOR_V)
+
+    entry = _ranking_entry(store, positions, result.q, result.weights, criteria)
+    entry.update(carried)
+    return entry
+
+def select_ranking_page(ranking, page=1, page_size=DEFAULT_PAGE_SIZE, top_k=None):
+    """
+    Memilih alternatif untuk satu halaman ranking. Hanya `page * page_size` nilai Q terkecil yang
+    diurutkan (argpartition), dan prefix urutan itu disimpan di entri cache untuk halaman berikutnya.
+    Mengembalikan (urutan lokal untuk halaman ini, info paginasi).
+    """
+    total = len(ranking['q']) if top_k is None else min(top_k, len(ranking['q']))
+    page_count = max(1, -(-total // page_size))
+    page = min(max(page, 1), page_count)
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+
+    order_prefix = ranking.get('order_prefix')
+    if order_prefix is None or len(order_prefix) < end:
+        order_prefix = mcdm.top_k_order(ranking['q'], end)
+        ranking['order_prefix'] = order_prefix
+
+    pagination = {
+        'page': page,
+        'page_count': page_count,
+        'page_size': page_size,
+        'top_k': top_k,
+        'start_rank': start + 1,
+        'end_rank': end,
+        'total': total,
+    }
+    return order_prefix[start:end], pagination
+
+def format_ranked_rows(store, ranking, order, start_rank=1):
+    """Menyiapkan data tampilan results.html hanya untuk baris yang ditampilkan."""
+    rows = ranking['positions'][order]
+    ranked_results = {col: values[rows] for col, values in store.columns.items()}
+
+    ranked_results['VIKOR_Score'] = ranking['q'][order]
+    ranked_results['Rank'] = np.arange(start_rank, start_rank + len(rows))
+
+    ranked_results['Price_Formatted'] = format_rupiah_batch(ranked_results['Price'])
+    ranked_results['VIKOR_Score_Formatted'] = format_angka_tampilan_batch(ranked_results['VIKOR_Score'])
+
+    if 'Rating' in ranked_results:
+            rating = ranked_results['Rating']
+            # Rating float32 (ingest streaming) ditampilkan dengan representasi desimal terpendeknya
+            ranked_results['Rating_Display'] = rating.astype(str).astype(float) if rating.dtype == np.float32 else rating.astype(float)
+    if 'Accessibility_Score' in ranked_results:
+            ranked_results['Accessibility_Score_Formatted'] = format_angka_tampilan_batch(ranked_results['Accessibility_Score'], maks_desimal=1)
+    if 'Time_Minutes' in ranked_results: # Tambahkan format untuk Time_Minutes
+            ranked_results['Time_Minutes_Formatted'] = np.char.add(format_angka_tampilan_batch(ranked_results['Time_Minutes'], maks_desimal=0), ' min')
+
+    if 'distances' in ranking:
+        ranked_results['Distance_Formatted'] = np.char.add(format_angka_tampilan_batch(ranking['distances'][order], maks_desimal=1), ' km')
+    if 'relevance' in ranking:
+        ranked_results['Relevance_Formatted'] = format_angka_tampilan_batch(ranking['relevance'][order], maks_desimal=2)
+
+    not_available = np.full(len(rows), 'N/A')
+    ranked_results['Toilet_Availability_For_Display'] = np.char.capitalize(ranked_results.get('Toilet_Availability_Display', not_available).astype(str))
+    ranked_results['Parking_Availability_For_Display'] = np.char.capitalize(ranked_results.get('Parking_Availability_Display', not_available).astype(str))
+
+    if 'Rating_Display' in ranked_results:
+        ranked_results['rating_full'], ranked_results['rating_half'], ranked_results['rating_empty'] = hitung_bintang_rating(ranked_results['Rating_Display'])
+    else:
+        # Fallback jika Rating_Display tidak ada
+        ranked_results['rating_full'] = np.zeros(len(rows), dtype=int)
+        ranked_results['rating_half'] = np.zeros(len(rows), dtype=int)
+        ranked_results['rating_empty'] = np.full(len(rows), 5)
+
+    names = list(ranked_results)
+    return [dict(zip(names, values)) for values in zip(*(ranked_results[name].tolist() for name in names))]
+
+def _set_dataset(new_df, version):
+    # Dipanggil dengan _ranking_cache_lock sudah dipegang
+    global df, CITIES, DATASET_VERSION, DATASET_STORE, _overall_base
+    new_store = build_dataset_store(new_df, CRITERIA, load_coordinates(new_df))
+    df, CITIES, DATASET_VERSION = new_df, ['All'] + sorted(new_df['City'].unique().tolist()), version
+    DATASET_STORE = new_store
+    _ranking_cache.clear()
+    _overall_base = None
+
+def install_dataset(new_df, version=None, warm=True):
+    """
+    Mengganti dataset aktif dengan DataFrame yang sudah dibersihkan (mis. data sintetis untuk
+    benchmark.py) dan mengosongkan cache. Tanpa `version`, sidik jari CSV saat ini dipakai agar
+    refresh_dataset_if_changed() tidak langsung memuat ulang CSV.
+    """
+    with _ranking_cache_lock:
+        _set_dataset(new_df, dataset_fingerprint() if version is None else version)
+    if warm:
+        warm_ranking_cache()
+
+def refresh_dataset_if_changed():
+    """
+    Memuat ulang dataset dan mengosongkan cache jika sidik jari CSV berubah. Jika pemuatan
+    gagal (CSV rusak atau terhapus), sidik jari itu dicatat dan baru dicoba lagi setelah
+    mtime atau ukuran file berubah lagi, sehingga request berikutnya tidak mem-parsing ulang.
+    """
+    global _failed_dataset_version
+    current_version = dataset_fingerprint()
+    if current_version in (DATASET_VERSION, _failed_dataset_version):
+        return False
+
+    with _ranking_cache_lock:
+        if current_version in (DATASET_VERSION, _failed_dataset_version): # Sudah ditangani thread lain
+            return False
+        try:
+            new_df, _ = load_dataset_fast()
+            _set_dataset(new_df, current_version)
+        except Exception as e:
+            _failed_dataset_version = current_version
+            print(f"An error occurred while reloading the dataset, keeping the previous version: {e}")
+            return False
+    warm_ranking_cache(use_precomputed=True)
+    return True
+
+def get_city_ranking(store, choice, criteria=CRITERIA, benefit_criteria=BENEFIT_CRITERIA, v=VIKOR_V):
+    """
+    Mengambil ranking `store` dari cache; menghitung dan menyimpannya jika belum ada.
+    Setiap request membaca DATASET_STORE sekali lalu memakai store yang sama sampai selesai,
+    sehingga posisi baris di entri selalu cocok dengan store yang dipakai untuk menampilkannya.
+    """
+    key = (choice, tuple(criteria), tuple(benefit_criteria), v)
+    entry = _ranking_cache.get(key)
+    if entry is not None and entry['store'] is store:
+        return entry
+
+    entry = compute_city_ranking(store, choice, criteria, benefit_criteria, v)
+    entry.setdefault('store', store) # Entri 'error' juga dicatat per store
+    if choice in store.city_rows: # Jangan simpan pilihan kota sembarang agar cache tidak tumbuh tanpa batas
+        with _ranking_cache_lock:
+            if store is DATASET_STORE: # Dataset tidak diganti selama perhitungan
+                _ranking_cache[key] = entry
+    return entry
+
+def build_overall_base(store, criteria=CRITERIA, benefit_criteria=BENEFIT_CRITERIA):
+    """
+    Matriks kriteria seluruh dataset (read-only) beserta statistik cukupnya, dipakai untuk
+    menilai destinasi baru secara inkremental. None jika ada kolom kriteria yang hilang.
+    """
+    if store.matrix is None or any(c not in store.criteria for c in criteria):
+        return None
+    matrix = store.matrix[:, [store.criteria.index(c) for c in criteria]] if tuple(criteria) != store.criteria else store.matrix
+    if not store.valid_rows.all():
+        matrix = matrix[store.valid_rows]
+    matrix.flags.writeable = False
+    return {
+        'matrix': matrix,
+        'stats': (store.criteria_stats if store.criteria_stats is not None and tuple(criteria) == store.criteria
+                  else mcdm.criteria_stats(matrix) if len(matrix) else None),
+        'benefit_mask': np.isin(criteria, benefit_criteria),
+    }
+
+def get_overall_base(store):
+    global _overall_base
+    base = _overall_base
+    if base is None or base['store'] is not store:
+        base = build_overall_base(store)
+        if base is not None:
+            base['store'] = store
+            with _ranking_cache_lock:
+                if store is DATASET_STORE:
+                    _overall_base = base
+    return base
+
+def compute_ranking_sensitivity(store, choice, v_values, n_perturbations, spread, top_k, seed=None):
+    """
+    Stabilitas ranking satu pilihan kota terhadap nilai v dan perturbasi bobot CRITIC.
+    Bobot dan Q dasar diambil dari cache ranking; matriks ter-normalisasi dihitung sekali
+    lalu semua skenario dinilai sekaligus oleh mcdm.vikor_sensitivity().
+    Mengembalikan dict berisi ranking dasar dan SensitivityResult, atau 'error'.
+    """
+    ranking = get_city_ranking(store, choice)
+    if 'error' in ranking:
+        return ranking
+    _, matrix = city_criteria_matrix(store, choice)
+    with stage('sensitivity', rows=len(matrix)):
+        normalized = mcdm.normalize(matrix)
+        result = mcdm.vikor_sensitivity(normalized, ranking['weight_values'], np.isin(CRITERIA, BENEFIT_CRITERIA),
+                                        v_values, n_perturbations=n_perturbations, spread=spread, top_k=top_k, seed=seed)
+    return {'ranking': ranking, 'sensitivity': result}
+
+def rank_all_cities_cached(precomputed=None):
+    """
+    Tabel ranking semua pilihan kota (kota -> precompute.CityRanking) yang juga dilayani dari cache.
+    Pilihan yang belum ada di cache diambil dari `precomputed` (hasil precompute.load_rankings())
+    jika diberikan, jika tidak dihitung sekaligus oleh precompute.rank_all_cities() secara serial:
+    fungsi ini berjalan saat modul diimpor dan di thread request, tempat process pool tidak aman
+    dibuat (lihat precompute.py). Pilihan dengan data tidak mencukupi tetap disimpan di cache
+    sebagai entri 'error' dan tidak ikut dikembalikan.
+    """
+    store = DATASET_STORE
+    key_suffix = (tuple(CRITERIA), tuple(BENEFIT_CRITERIA), VIKOR_V)
+    choices = sorted(store.city_rows, key=lambda city: (city != 'All', city)) # Urutan sama seperti CITIES
+    cached = {city: _ranking_cache.get((city,) + key_suffix) for city in choices}
+    if any(entry is None or entry['store'] is not store for entry in cached.values()):
+        rankings = precomputed if precomputed is not None else precompute.rank_all_cities(store, CRITERIA, BENEFIT_CRITERIA, VIKOR_V)
+        with _ranking_cache_lock:
+            if store is DATASET_STORE: # Dataset tidak diganti selama perhitungan
+                for city, ranking in rankings.items():
+                    _ranking_cache[(city,) + key_suffix] = _ranking_entry(store, ranking.positions, ranking.q, ranking.weights)
+
+    entries = {city: get_city_ranking(store, city) for city in choices}
+    return {city: precompute.CityRanking(entry['positions'], entry['q'], entry['weight_values'])
+            for city, entry in entries.items() if 'error' not in entry}
+
+# --- Indeks Pencarian ---
+# Dimuat saat request 'search' pertama, bukan saat impor, agar cold start tidak ikut membaca
+# (atau membangun) indeks BM25 yang belum tentu dipakai.
+_search_index = None
+_search_index_loaded = False
+_search_index_lock = threading.Lock()
+
+def get_search_index():
+    """Indeks BM25 dari search.load_search_index(), dimuat sekali lalu disimpan di memori. None jika gagal."""
+    global _search_index, _search_index_loaded
+    if not _search_index_loaded:
+        with _search_index_lock:
+            if not _search_index_loaded:
+                _search_index = search.load_search_index()
+                _search_index_loaded = True
+    return _search_index
+
+def warm_ranking_cache(use_precomputed=False):
+    """
+    Menghitung ranking untuk 'All' dan setiap kota sekaligus saat aplikasi dimulai. Dengan
+    use_precomputed (dataset dimuat dari DATA_FILE), tabel dari `python precompute.py` dipakai
+    jika masih segar sehingga tidak ada yang dihitung ulang.
+    """
+    if df.empty:
+        return
+    store = DATASET_STORE
+    precomputed = precompute.load_rankings(store, CRITERIA, BENEFIT_CRITERIA, VIKOR_V) if use_precomputed else None
+    rank_all_cities_cached(precomputed)
+    get_overall_base(store)
+
+
+DATASET_STORE = build_dataset_store(df, CRITERIA, load_coordinates(df))
+if WARM_CACHE_ON_STARTUP:
+    warm_ranking_cache(use_precomputed=True)
+print(f"Startup completed in {(time.perf_counter() - _startup_started) * 1000:.1f} ms "
+      f"(dataset source: {DATASET_SOURCE}, {len(df)} rows, {len(CITIES) - 1} cities).")
+
+
+# --- Validasi Destinasi Baru ---
+# Nama field formulir index.html untuk setiap kolom dataset
+NEW_DATA_FORM_FIELDS = {
+    'Place_Name': 'new_place_name',
+    'City': 'new_city',
+    'Price': 'new_price',
+    'Rating': 'new_rating',
+    'Accessibility_Score': 'new_accessibility_score',
+    'Time_Minutes': 'new_time_minutes',
+    'Toilet_Availability': 'new_toilet_availability',
+    'Parking_Availability': 'new_parking_availability',
+}
+
+MAX_BATCH_SIZE = 10000
+
+def _parse_facility(value):
+    if isinstance(value, bool):
+        return 1 if value else 0
+    return 1 if str(value).strip().lower() in ('yes', 'true', '1') else 0
+
+def parse_new_destination(record):
+    """
+    Memvalidasi satu destinasi baru (dict dengan nama kolom dataset) dan mengembalikan
+    (data kriteria, data tampilan). Melempar ValueError/KeyError/TypeError/OverflowError jika tidak valid.
+    """
+    new_data_input = {
+        'Place_Name': str(record['Place_Name']),
+        'City': str(record['City']).title(),
+        'Price': int(record['Price']),
+        'Rating': float(record['Rating']),
+        'Accessibility_Score': float(record['Accessibility_Score']),
+        'Time_Minutes': float(record.get('Time_Minutes', 60)),
+        'Toilet_Availability': _parse_facility(record.get('Toilet_Availability', 'no')),
+        'Parking_Availability': _parse_facility(record.get('Parking_Availability', 'no')),
+    }
+    if not np.isfinite([new_data_input[c] for c in CRITERIA]).all():
+        raise ValueError("criteria values must be finite numbers")
+
+    new_data_input_display_extras = { # Untuk tampilan string di detail
+        'Toilet_Availability_Display': 'Yes' if new_data_input['Toilet_Availability'] else 'No',
+        'Parking_Availability_Display': 'Yes' if new_data_input['Parking_Availability'] else 'No',
+    }
+    return new_data_input, new_data_input_display_extras
+
+def parse_new_destinations(records):
+    """
+    Validasi massal untuk API batch. Mengembalikan (daftar data kriteria, daftar error);
+    setiap error mencatat posisi kandidat dalam list masukan.
+    """
+    parsed, errors = [], []
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append({'index': position, 'error': "each destination must be a JSON object"})
+            continue
+        try:
+            parsed.append(parse_new_destination(record)[0])
+        except KeyError as e:
+            errors.append({'index': position, 'error': f"missing field {e}"})
+        except (ValueError, TypeError, OverflowError) as e:
+            errors.append({'index': position, 'error': str(e)})
+    return parsed, errors
 
 
 # --- Rute Aplikasi Web ---
+def _int_param(name, default, maximum=None, minimum=1):
+    """Membaca parameter bilangan bulat (>= minimum) dari form/query; nilai tidak valid memakai default."""
+    try:
+        value = int(request.values.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    if value < minimum:
+        return default
+    return min(value, maximum) if maximum is not None else value
+
+def _float_param(name, default, minimum=0.0, maximum=None):
+    """Membaca parameter float berhingga (>= minimum) dari form/query; nilai tidak valid memakai default."""
+    try:
+        value = float(request.values.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    if not np.isfinite(value) or value < minimum:
+        return default
+    return min(value, maximum) if maximum is not None else value
+
+def render_ranking_page(store, ranking, title, form_field_names, top_k=None, **template_options):
+    """
+    Memilih halaman ranking dari parameter request, memformat hanya baris yang ditampilkan,
+    lalu merender results.html. `form_field_names` adalah field formulir yang dikirim ulang
+    oleh tombol paginasi; `template_options` diteruskan ke template (mis. show_distance).
+    """
+    page_size = _int_param('page_size', DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    with stage('select_page', rows=len(ranking['q'])):
+        order, pagination = select_ranking_page(ranking, page=_int_param('page', 1), page_size=page_size, top_k=top_k)
+    pagination['form_fields'] = {field: request.form[field] for field in form_field_names if request.form.get(field)}
+
+    with stage('format', rows=len(order)):
+        ranked_results = format_ranked_rows(store, ranking, order, pagination['start_rank'])
+
+    with stage('render', rows=len(order)):
+        return render_template('results.html',
+                                title=title,
+                                ranked_results=ranked_results,
+                                weights=ranking['weights'],
+                                pagination=pagination,
+                                is_new_data_submission=False,
+                                **template_options)
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
+    if request.method == 'POST':
+        refresh_dataset_if_changed() # Muat ulang dataset + buang cache jika CSV berubah
+
     if df.empty and request.method == 'POST': # Jika df kosong dan ada POST, berarti CSV gagal load
         return render_template('index.html', cities=CITIES, error="Dataset could not be loaded. Please check the server console for errors regarding 'tourism_data_updated.csv'.")
 
     if request.method == 'POST': 
-        temp_df_original = df.copy() 
         submit_type = request.form.get('submit_button') 
         title = "" 
-        
-        # --- Kriteria didefinisikan di sini ---
-        criteria = ['Price', 'Rating', 'Accessibility_Score', 'Toilet_Availability', 'Parking_Availability', 'Time_Minutes'] 
-        
-        # === PERUBAHAN DI SINI ===
-        # Time_Minutes sekarang dianggap sebagai BENEFIT (semakin lama semakin bagus)
-        benefit_criteria = ['Rating', 'Accessibility_Score', 'Toilet_Availability', 'Parking_Availability', 'Time_Minutes'] 
-        # --- Akhir Perubahan Kriteria ---
+        store = DATASET_STORE # Dibaca sekali: ranking dan format tampilan memakai versi dataset yang sama
         
         if submit_type == 'city_selection': 
             choice = request.form['city_choice'] 
             if choice == 'All':
-                data_to_process = temp_df_original
                 title = "🏆 DESTINA Recommendations (All Cities)"
             else:
-                data_to_process = temp_df_original[temp_df_original['City'] == choice]
                 title = f"🏆 DESTINA Recommendations for {choice} City"
 
-            if data_to_process.empty or len(data_to_process) < 2:
-                return render_template('index.html', cities=CITIES, error="Not enough data for comparison in this city/selection (minimum 2 destinations).")
+            instrumentation.set_label(choice if choice in CITIES else 'other')
+            with stage('ranking_lookup'):
+                ranking = get_city_ranking(store, choice)
+            if 'error' in ranking:
+                return render_template('index.html', cities=CITIES, error=ranking['error'])
 
-            missing_criteria = [c for c in criteria if c not in data_to_process.columns]
-            if missing_criteria:
-                return render_template('index.html', cities=CITIES, error=f"The following criteria columns are missing: {', '.join(missing_criteria)}. Please check the CSV file and data loading section in app.py.")
+            return render_ranking_page(store, ranking, title, ('submit_button', 'city_choice'), top_k=_int_param('top_k', None))
 
-            numerical_data = data_to_process[criteria].copy()
-            for col in criteria: # Pastikan konversi numerik
-                numerical_data[col] = pd.to_numeric(numerical_data[col], errors='coerce')
-            numerical_data.dropna(subset=criteria, inplace=True) # Hapus baris jika ada NaN di kriteria PENTING
+        elif submit_type == 'nearby':
+            try:
+                lat = float(request.form['near_lat'])
+                lon = float(request.form['near_long'])
+                radius_km = float(request.form.get('near_radius_km') or DEFAULT_NEARBY_RADIUS_KM)
+                k = int(request.form['near_k']) if request.form.get('near_k') else None
+                if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    raise ValueError("latitude must be between -90 and 90 and longitude between -180 and 180")
+                if not 0 < radius_km <= MAX_NEARBY_RADIUS_KM or (k is not None and k < 2):
+                    raise ValueError(f"radius must be between 0 and {MAX_NEARBY_RADIUS_KM} km and the number of nearest destinations at least 2")
+            except (ValueError, KeyError, TypeError) as e:
+                return render_template('index.html', cities=CITIES, error=f"Location is invalid or incomplete: {e}. Please try again.")
+            include_distance = request.form.get('near_include_distance') in ('yes', 'on', '1')
+
+            instrumentation.set_label('nearby')
+            ranking = compute_nearby_ranking(store, lat, lon, radius_km=radius_km, k=k, include_distance=include_distance)
+            if 'error' in ranking:
+                return render_template('index.html', cities=CITIES, error=ranking['error'])
+
+            if k is not None:
+                title = f"📍 DESTINA Recommendations: {k} Nearest Destinations"
+            else:
+                title = f"📍 DESTINA Recommendations within {format_angka_tampilan(radius_km)} km"
 
-            if len(numerical_data) < 2: # Cek lagi setelah dropna
-                return render_template('index.html', cities=CITIES, error="Not enough valid data after cleaning (due to missing values in criteria columns) for comparison.")
+            return render_ranking_page(store, ranking, title, ('submit_button', 'near_lat', 'near_long', 'near_radius_km', 'near_k', 'near_include_distance'),
+                                       show_distance=True)
 
-            weights_for_selection = critic_weight(numerical_data)
-            vikor_rankings_for_selection = vikor_method(numerical_data, weights_for_selection, benefit_criteria)
-            
-            if vikor_rankings_for_selection.empty:
-                return render_template('index.html', cities=CITIES, error="Could not compute VIKOR rankings, possibly due to insufficient distinct data after processing.")
+        elif submit_type == 'search':
+            query = request.form.get('search_query', '').strip()[:MAX_SEARCH_QUERY_LENGTH]
+            choice = request.form.get('search_city', 'All')
+            if not search.tokenize(query):
+                return render_template('index.html', cities=CITIES, error="Please enter at least one keyword to search for (e.g. 'pantai' or 'museum').")
+            include_relevance = request.form.get('search_include_relevance') in ('yes', 'on', '1')
 
-            ranked_results = data_to_process.loc[numerical_data.index].loc[vikor_rankings_for_selection.index].copy()
-            
-            ranked_results['VIKOR_Score'] = vikor_rankings_for_selection.values
-            ranked_results['Rank'] = range(1, len(ranked_results) + 1)
-            
-            ranked_results['Price_Formatted'] = ranked_results['Price'].apply(lambda x: f"Rp {int(x):,.0f}".replace(',', '.'))
-            ranked_results['VIKOR_Score_Formatted'] = ranked_results['VIKOR_Score'].apply(format_angka_tampilan)
-            
-            if 'Rating' in ranked_results.columns:
-                    ranked_results['Rating_Display'] = ranked_results['Rating'].astype(float)
-            if 'Accessibility_Score' in ranked_results.columns:
-                    ranked_results['Accessibility_Score_Formatted'] = ranked_results['Accessibility_Score'].apply(lambda x: format_angka_tampilan(x, maks_desimal=1))
-            if 'Time_Minutes' in ranked_results.columns: # Tambahkan format untuk Time_Minutes
-                    ranked_results['Time_Minutes_Formatted'] = ranked_results['Time_Minutes'].apply(lambda x: f"{format_angka_tampilan(x, maks_desimal=0)} min")
-
-
-            ranked_results['Toilet_Availability_For_Display'] = ranked_results.get('Toilet_Availability_Display', pd.Series(['N/A'] * len(ranked_results))).str.capitalize()
-            ranked_results['Parking_Availability_For_Display'] = ranked_results.get('Parking_Availability_Display', pd.Series(['N/A'] * len(ranked_results))).str.capitalize()
-
-            rating_full_list, rating_half_list, rating_empty_list = [], [], []
-            if 'Rating_Display' in ranked_results.columns:
-                for r_val in ranked_results['Rating_Display']:
-                    r_val_float = float(r_val) # Pastikan float
-                    full_stars = int(r_val_float)
-                    half_star = 0
-                    if (r_val_float - full_stars) >= 0.75:
-                        full_stars +=1
-                    elif (r_val_float - full_stars) >= 0.25:
-                        half_star = 1
-                    rating_full_list.append(full_stars)
-                    rating_half_list.append(half_star)
-                    rating_empty_list.append(5 - full_stars - half_star)
-                ranked_results['rating_full'] = rating_full_list
-                ranked_results['rating_half'] = rating_half_list
-                ranked_results['rating_empty'] = rating_empty_list
-            else:
-                # Fallback jika Rating_Display tidak ada
-                ranked_results['rating_full'] = [0] * len(ranked_results)
-                ranked_results['rating_half'] = [0] * len(ranked_results)
-                ranked_results['rating_empty'] = [5] * len(ranked_results)
+            instrumentation.set_label(choice if choice in CITIES else 'other')
+            with stage('search_index'):
+                search_index = get_search_index()
+            ranking = compute_search_ranking(store, search_index, query, choice=choice, include_relevance=include_relevance)
+            if 'error' in ranking:
+                return render_template('index.html', cities=CITIES, error=ranking['error'])
 
+            title = f"🔎 DESTINA Recommendations for \"{query}\""
+            if choice != 'All':
+                title += f" in {choice} City"
 
-            weights_dict_for_selection = {k: format_angka_tampilan(v) for k, v in weights_for_selection.to_dict().items()}
-
-            return render_template('results.html', 
-                                    title=title, 
-                                    ranked_results=ranked_results.to_dict('records'),
-                                    weights=weights_dict_for_selection,
-                                    is_new_data_submission=False)
+            return render_ranking_page(store, ranking, title, ('submit_button', 'search_query', 'search_city', 'search_include_relevance'),
+                                       show_relevance=True)
 
         elif submit_type == 'new_data': 
             try:
-                new_toilet_input_str = request.form.get('new_toilet_availability', 'no').lower()
-                new_parking_input_str = request.form.get('new_parking_availability', 'no').lower()
-                
-                new_data_input = {
-                    'Place_Name': request.form['new_place_name'],
-                    'City': request.form['new_city'].title(),
-                    'Price': int(request.form['new_price']),
-                    'Rating': float(request.form['new_rating']),
-                    'Accessibility_Score': float(request.form['new_accessibility_score']),
-                    'Time_Minutes': float(request.form.get('new_time_minutes', 60)), # Ambil Time_Minutes
-                    'Toilet_Availability': 1 if new_toilet_input_str == 'yes' else 0,
-                    'Parking_Availability': 1 if new_parking_input_str == 'yes' else 0,
-                }
-                new_data_input_display_extras = { # Untuk tampilan string di detail
-                    'Toilet_Availability_Display': new_toilet_input_str.capitalize(),
-                    'Parking_Availability_Display': new_parking_input_str.capitalize()
-                }
-
-            except (ValueError, KeyError) as e:
+                new_data_input, new_data_input_display_extras = parse_new_destination(
+                    {col: request.form[field] for col, field in NEW_DATA_FORM_FIELDS.items() if field in request.form}
+                )
+            except (ValueError, KeyError, TypeError, OverflowError) as e:
                 return render_template('index.html', cities=CITIES, error=f"New data is invalid or incomplete: {e}. Ensure all fields are filled correctly. Please try again.")
 
             title = f"📊 Analysis Results for New Destination: {new_data_input['Place_Name']}"
-            
-            new_df_row_data = new_data_input.copy()
-            new_df_row_data.update(new_data_input_display_extras) # Tambahkan versi display
-            new_df_row = pd.DataFrame([new_df_row_data])
-            
-            df_for_overall_ranking = pd.concat([temp_df_original, new_df_row], ignore_index=True)
-            
-            if df_for_overall_ranking.empty or len(df_for_overall_ranking) < 1: # Seharusnya < 2 untuk perbandingan
-                return render_template('index.html', cities=CITIES, error="No data to process for ranking (need at least 2 for CRITIC).")
-
-            missing_criteria_overall = [c for c in criteria if c not in df_for_overall_ranking.columns]
-            if missing_criteria_overall:
-                    return render_template('index.html', cities=CITIES, error=f"The following criteria columns are missing for overall data: {', '.join(missing_criteria_overall)}.")
+            new_row = np.array([new_data_input[c] for c in CRITERIA], dtype=float)
 
-            numerical_data_overall = df_for_overall_ranking[criteria].copy()
-            for col in criteria:
-                numerical_data_overall[col] = pd.to_numeric(numerical_data_overall[col], errors='coerce')
-            numerical_data_overall.dropna(subset=criteria, inplace=True)
-
-            if len(numerical_data_overall) < 2 : # CRITIC butuh minimal 2 baris data yang valid
+            overall_base = get_overall_base(store)
+            if overall_base is None:
+                return render_template('index.html', cities=CITIES, error=f"The following criteria columns are missing for overall data: {', '.join(c for c in CRITERIA if c not in df.columns)}.")
+            if len(overall_base['matrix']) < 1: # CRITIC butuh minimal 2 baris data yang valid (termasuk data baru)
                 return render_template('index.html', cities=CITIES, error="Not enough valid distinct data after cleaning for overall comparison (CRITIC needs min 2).")
 
-            weights_overall = critic_weight(numerical_data_overall)
-            vikor_rankings_overall = vikor_method(numerical_data_overall, weights_overall, benefit_criteria)
-
-            if vikor_rankings_overall.empty:
-                    return render_template('index.html', cities=CITIES, error="Could not compute VIKOR rankings for new data, possibly due to insufficient distinct data after processing.")
-            
-            ranked_results_overall = df_for_overall_ranking.loc[numerical_data_overall.index].loc[vikor_rankings_overall.index].copy()
-            
-            ranked_results_overall['VIKOR_Score_Overall'] = vikor_rankings_overall.values
-            ranked_results_overall['Rank_Overall'] = range(1, len(ranked_results_overall) + 1)
-
-            # Mencari data baru yang ditambahkan
-            newly_added_data_ranked_series = ranked_results_overall[
-                (ranked_results_overall['Place_Name'] == new_data_input['Place_Name']) &
-                (ranked_results_overall['City'] == new_data_input['City']) &
-                (ranked_results_overall['Price'] == new_data_input['Price']) &
-                (abs(ranked_results_overall['Rating'] - new_data_input['Rating']) < 0.01) & # Perbandingan float
-                (abs(ranked_results_overall['Accessibility_Score'] - new_data_input['Accessibility_Score']) < 0.01) &
-                (abs(ranked_results_overall['Time_Minutes'] - new_data_input['Time_Minutes']) < 0.01)
-            ]
-
-            if newly_added_data_ranked_series.empty:
-                return render_template('index.html', cities=CITIES, error="Newly added data not found after ranking. There might be an issue with input data matching or processing.")
-            
-            newly_added_data_ranked = newly_added_data_ranked_series.iloc[0]
+            # Ranking inkremental: hanya data baru yang dinilai terhadap statistik dataset yang sudah di-cache
+            with stage('rank_new', rows=len(overall_base['matrix'])):
+                evaluation = mcdm.rank_new_alternative(overall_base['matrix'], overall_base['stats'], new_row,
+                                                       overall_base['benefit_mask'], v=VIKOR_V)
 
             new_destination_details = {
-                'Place_Name': newly_added_data_ranked['Place_Name'],
-                'City': newly_added_data_ranked['City'],
-                'Price_Formatted': f"Rp {int(newly_added_data_ranked['Price']):,.0f}".replace(',', '.'),
+                'Place_Name': new_data_input['Place_Name'],
+                'City': new_data_input['City'],
+                'Price_Formatted': str(format_rupiah_batch([new_data_input['Price']])[0]),
                 'Rating_Original': new_data_input['Rating'],
                 'Accessibility_Score_Original': new_data_input['Accessibility_Score'],
-                'Time_Minutes_Original': new_data_input['Time_Minutes'], # Tambahkan ini
+                'Time_Minutes_Original': new_data_input['Time_Minutes'],
                 'Toilet_Availability_Original': new_data_input_display_extras['Toilet_Availability_Display'],
                 'Parking_Availability_Original': new_data_input_display_extras['Parking_Availability_Display'],
-                'VIKOR_Score_Overall_Formatted': format_angka_tampilan(newly_added_data_ranked['VIKOR_Score_Overall']),
-                'Rank_Overall': newly_added_data_ranked['Rank_Overall'],
-                'Total_Destinations_Overall': len(ranked_results_overall)
+                'VIKOR_Score_Overall_Formatted': format_angka_tampilan(evaluation.q),
+                'Rank_Overall': evaluation.rank,
+                'Total_Destinations_Overall': evaluation.total
             }
             
-            r_val = float(new_data_input['Rating'])
-            full_stars = int(r_val)
-            half_star = 0
-            if (r_val - full_stars) >= 0.75:
-                full_stars +=1
-            elif (r_val - full_stars) >= 0.25:
-                half_star = 1
-            new_destination_details['rating_full'] = full_stars
-            new_destination_details['rating_half'] = half_star
-            new_destination_details['rating_empty'] = 5 - full_stars - half_star
+            rating_full, rating_half, rating_empty = hitung_bintang_rating([new_data_input['Rating']])
+            new_destination_details['rating_full'] = int(rating_full[0])
+            new_destination_details['rating_half'] = int(rating_half[0])
+            new_destination_details['rating_empty'] = int(rating_empty[0])
             
-            weights_dict_overall = {k: format_angka_tampilan(v) for k, v in weights_overall.to_dict().items()}
-
-            return render_template('results.html',
-                                    title=title,
-                                    is_new_data_submission=True,
-                                    new_destination_details=new_destination_details,
-                                    weights_for_overall_rank=weights_dict_overall)
+            weights_dict_overall = dict(zip(CRITERIA, format_angka_tampilan_batch(evaluation.weights).tolist()))
+
+            with stage('render'):
+                return render_template('results.html',
+                                        title=title,
+                                        is_new_data_submission=True,
+                                        new_destination_details=new_destination_details,
+                                        weights_for_overall_rank=weights_dict_overall)
         else:
             return render_template('index.html', cities=CITIES)
 
     return render_template('index.html', cities=CITIES)
 
+@app.route('/api/rank/batch', methods=['POST'])
+def rank_batch():
+    """
+    Meranking banyak destinasi baru sekaligus. Body JSON:
+    {"destinations": [{"Place_Name": ..., "City": ..., "Price": ..., ...}], "mode": "combined" | "isolated"}
+    - combined: CRITIC + VIKOR dijalankan sekali atas dataset + semua kandidat.
+    - isolated: setiap kandidat dinilai sendiri terhadap dataset (seperti formulir new_data),
+      memakai statistik dataset yang sudah di-cache.
+    """
+    refresh_dataset_if_changed()
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('destinations'), list):
+        return jsonify(error="Request body must be a JSON object with a 'destinations' list."), 400
+
+    mode = payload.get('mode', 'combined')
+    if mode not in ('combined', 'isolated'):
+        return jsonify(error="Invalid mode. Use 'combined' or 'isolated'."), 400
+
+    records = payload['destinations']
+    if not records:
+        return jsonify(error="The 'destinations' list is empty."), 400
+    if len(records) > MAX_BATCH_SIZE:
+        return jsonify(error=f"Too many destinations in one batch (maximum {MAX_BATCH_SIZE})."), 413
+
+    started = time.perf_counter()
+    with stage('validate', rows=len(records)):
+        parsed, errors = parse_new_destinations(records)
+    if errors:
+        return jsonify(error="Some destinations are invalid or incomplete.", details=errors), 400
+
+    overall_base = get_overall_base(DATASET_STORE) if not df.empty else None
+    if overall_base is None or len(overall_base['matrix']) < 1:
+        return jsonify(error="Dataset could not be loaded or has no valid destinations to compare against."), 503
+
+    base_matrix = overall_base['matrix']
+    candidates = np.array([[destination[c] for c in CRITERIA] for destination in parsed], dtype=float)
+
+    response = {'mode': mode}
+    if mode == 'combined':
+        with stage('rank_combined', rows=len(base_matrix) + len(candidates)):
+            result = mcdm.critic_vikor(np.vstack([base_matrix, candidates]), overall_base['benefit_mask'], v=VIKOR_V)
+            ranks = mcdm.rank_positions(result.q)[len(base_matrix):]
+        q_values = result.q[len(base_matrix):]
+        totals = [len(base_matrix) + len(candidates)] * len(candidates)
+        response['weights'] = dict(zip(CRITERIA, result.weights.tolist()))
+    else:
+        with stage('rank_isolated', rows=len(candidates)):
+            evaluations = [mcdm.rank_new_alternative(base_matrix, overall_base['stats'], row, overall_base['benefit_mask'], v=VIKOR_V)
+                           for row in candidates]
+        ranks = [evaluation.rank for evaluation in evaluations]
+        q_values = [evaluation.q for evaluation in evaluations]
+        totals = [evaluation.total for evaluation in evaluations]
+
+    response['results'] = [
+        {
+            'Place_Name': destination['Place_Name'],
+            'City': destination['City'],
+            'Rank_Overall': int(rank),
+            'VIKOR_Score_Overall': float(q_value),
+            'Total_Destinations_Overall': int(total),
+        }
+        for destination, rank, q_value, total in zip(parsed, ranks, q_values, totals)
+    ]
+
+    elapsed = time.perf_counter() - started
+    response['count'] = len(parsed)
+    response['elapsed_seconds'] = elapsed
+    response['candidates_per_second'] = len(parsed) / elapsed if elapsed > 0 else None
+    return jsonify(response)
+
+@app.route('/api/rank/sensitivity', methods=['GET', 'POST'])
+def rank_sensitivity():
+    """
+    Stabilitas ranking satu kota terhadap parameter VIKOR. Parameter (query/form):
+    city (default 'All'), v_steps (grid v 0..1), perturbations (sampel bobot Monte-Carlo),
+    spread (simpangan log-normal perturbasi), top_k, seed dan limit (jumlah baris hasil).
+    Jumlah skenario = v_steps x (perturbations + 1).
+    """
+    refresh_dataset_if_changed()
+    if df.empty:
+        return jsonify(error="Dataset could not be loaded."), 503
+
+    choice = request.values.get('city', 'All')
+    v_steps = _int_param('v_steps', DEFAULT_SENSITIVITY_V_STEPS, maximum=MAX_SENSITIVITY_V_STEPS)
+    n_perturbations = _int_param('perturbations', DEFAULT_SENSITIVITY_PERTURBATIONS, minimum=0)
+    spread = _float_param('spread', DEFAULT_SENSITIVITY_SPREAD, maximum=5.0)
+    top_k = _int_param('top_k', DEFAULT_SENSITIVITY_TOP_K)
+    seed = _int_param('seed', None, minimum=0)
+    limit = _int_param('limit', None)
+
+    n_scenarios = v_steps * (n_perturbations + 1)
+    if n_scenarios > MAX_SENSITIVITY_SCENARIOS:
+        return jsonify(error=f"Too many scenarios ({n_scenarios}); v_steps x (perturbations + 1) must not exceed {MAX_SENSITIVITY_SCENARIOS}."), 413
+
+    v_values = np.linspace(0, 1, v_steps) if v_steps > 1 else np.array([VIKOR_V])
+    instrumentation.set_label(choice if choice in CITIES else 'other')
+    started = time.perf_counter()
+    store = DATASET_STORE
+    analysis = compute_ranking_sensitivity(store, choice, v_values, n_perturbations, spread, top_k, seed)
+    if 'error' in analysis:
+        return jsonify(error=analysis['error']), 400
+
+    ranking, sensitivity = analysis['ranking'], analysis['sensitivity']
+    order = mcdm.top_k_order(ranking['q'], len(ranking['q']) if limit is None else limit)
+    rows = ranking['positions'][order]
+    results = {
+        'Place_Name': store.columns['Place_Name'][rows].tolist(),
+        'City': store.columns['City'][rows].tolist(),
+        'Rank': np.arange(1, len(order) + 1).tolist(),
+        'VIKOR_Score': ranking['q'][order].tolist(),
+        'Mean_Rank': sensitivity.mean_rank[order].tolist(),
+        'Min_Rank': sensitivity.min_rank[order].tolist(),
+        'Max_Rank': sensitivity.max_rank[order].tolist(),
+        'Top_K_Probability': sensitivity.top_k_probability[order].tolist(),
+    }
+    names = list(results)
+    elapsed = time.perf_counter() - started
+    return jsonify(
+        city=choice,
+        scenarios=sensitivity.scenarios,
+        v_values=v_values.tolist(),
+        perturbations=n_perturbations,
+        spread=spread,
+        top_k=top_k,
+        weights=dict(zip(CRITERIA, ranking['weight_values'].tolist())),
+        total=len(ranking['q']),
+        results=[dict(zip(names, values)) for values in zip(*(results[name] for name in names))],
+        elapsed_seconds=elapsed,
+    )
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,258 @@
+"""
+Benchmark pipeline ranking DESTINA pada dataset sintetis berbagai ukuran.
+
+Contoh:
+    python benchmark.py                                   # 10^2 .. 10^6 baris, 5 dan 50 kota
+    python benchmark.py --sizes 100,10000 --cities 5 --output hasil.json
+    python benchmark.py --compare baseline.json --threshold 1.2
+
+Hasil ditulis ke file JSON (lihat --output). Dengan --compare, setiap metrik dibandingkan
+dengan file hasil sebelumnya dan rasio di atas --threshold dilaporkan sebagai regresi
+(exit code 1).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import precompute
+from dataset import DATA_FILE, load_dataset, load_dataset_streaming
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+DEFAULT_CITY_COUNTS = [5, 50]
+CSV_COLUMNS = ['Place_Id', 'Place_Name', 'Category', 'City', 'Price', 'Rating', 'Time_Minutes',
+               'Toilet_Availability', 'Parking_Availability', 'Accessibility_Score']
+
+
+# --- Data Sintetis ---
+def synthesize_dataset(n_rows, n_cities, seed=0, source_path=DATA_FILE):
+    """
+    Membuat DataFrame mentah dengan kolom yang sama seperti tourism_data_updated.csv.
+    Kriteria diambil ulang (bootstrap) dari dataset asli agar distribusi dan korelasinya mirip,
+    lalu diberi sedikit noise; tanpa dataset asli dipakai distribusi parametrik.
+    """
+    rng = np.random.default_rng(seed)
+    try:
+        source = pd.read_csv(source_path)
+    except (OSError, ValueError):
+        source = None
+
+    if source is not None and not source.empty:
+        sample = source.iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+        price = np.round(sample['Price'].to_numpy(dtype=float) * np.exp(rng.normal(0, 0.1, n_rows)) / 500) * 500
+        time_minutes = np.clip(sample['Time_Minutes'].to_numpy(dtype=float) + rng.normal(0, 5, n_rows), 0, None).round()
+        data = {
+            'Category': sample['Category'].to_numpy(),
+            'Price': price.astype(np.int64),
+            'Rating': sample['Rating'].to_numpy(),
+            'Time_Minutes': time_minutes,
+            'Toilet_Availability': sample['Toilet_Availability'].to_numpy(),
+            'Parking_Availability': sample['Parking_Availability'].to_numpy(),
+            'Accessibility_Score': sample['Accessibility_Score'].to_numpy(),
+        }
+    else:
+        data = {
+            'Category': rng.choice(['Budaya', 'Taman Hiburan', 'Cagar Alam', 'Bahari', 'Pusat Perbelanjaan', 'Tempat Ibadah'], n_rows),
+            'Price': (np.round(rng.lognormal(9, 1.5, n_rows) / 500) * 500).astype(np.int64),
+            'Rating': np.clip(rng.normal(4.4, 0.2, n_rows), 1, 5).round(1),
+            'Time_Minutes': np.clip(rng.normal(80, 40, n_rows), 0, None).round(),
+            'Toilet_Availability': rng.choice(['yes', 'no'], n_rows, p=[0.8, 0.2]),
+            'Parking_Availability': rng.choice(['yes', 'no'], n_rows, p=[0.85, 0.15]),
+            'Accessibility_Score': np.clip(rng.normal(8, 1.2, n_rows), 1, 10).round(1),
+        }
+
+    data['Place_Id'] = np.arange(1, n_rows + 1)
+    data['Place_Name'] = [f"Destinasi Sintetis {i}" for i in range(1, n_rows + 1)]
+    data['City'] = np.char.add('Kota ', (rng.integers(0, n_cities, n_rows) + 1).astype(str))
+    return pd.DataFrame(data)[CSV_COLUMNS]
+
+
+# --- Pengukuran ---
+def time_call(func, repeat):
+    """Median durasi (detik) dari `repeat` kali pemanggilan func()."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+def peak_memory(func):
+    """Puncak alokasi memori Python (byte) selama func() berjalan, via tracemalloc."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark_case(app_module, n_rows, n_cities, repeat, seed=0, workers=1):
+    """Menjalankan semua pengukuran untuk satu kombinasi (jumlah baris, jumlah kota)."""
+    raw = synthesize_dataset(n_rows, n_cities, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'synthetic.csv')
+        raw.to_csv(csv_path, index=False)
+        started = time.perf_counter()
+        data = load_dataset(csv_path)
+        load_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        load_dataset_streaming(csv_path)
+        load_streaming_seconds = time.perf_counter() - started
+        load_memory = {
+            'load_csv': peak_memory(lambda: load_dataset(csv_path)),
+            'load_csv_streaming': peak_memory(lambda: load_dataset_streaming(csv_path)),
+        }
+
+    criteria = app_module.CRITERIA
+    numerical_data = data[criteria]
+    weights = app_module.critic_weight(numerical_data)
+    busiest_city = data['City'].value_counts().index[0]
+
+    client = app_module.app.test_client()
+    city_form = {'submit_button': 'city_selection', 'city_choice': busiest_city}
+    all_form = {'submit_button': 'city_selection', 'city_choice': 'All'}
+    new_data_form = {
+        'submit_button': 'new_data', 'new_place_name': 'Benchmark Baru', 'new_city': busiest_city,
+        'new_price': '25000', 'new_rating': '4.5', 'new_accessibility_score': '8',
+        'new_time_minutes': '90', 'new_toilet_availability': 'yes', 'new_parking_availability': 'no',
+    }
+
+    def post(form):
+        response = client.post('/', data=form)
+        if response.status_code != 200:
+            raise RuntimeError(f"Request failed with status {response.status_code}")
+
+    def cold_city_selection():
+        app_module.install_dataset(data, warm=False)
+        post(city_form)
+
+    app_module.install_dataset(data, warm=False)
+    started = time.perf_counter()
+    app_module.warm_ranking_cache()
+    warm_cache_seconds = time.perf_counter() - started
+
+    def rank_all_cities(pool=None):
+        precompute.rank_all_cities(app_module.DATASET_STORE, app_module.CRITERIA, app_module.BENEFIT_CRITERIA,
+                                   app_module.VIKOR_V, pool=pool)
+    rank_serial_seconds = time_call(rank_all_cities, repeat)
+    # Pool dibuat sekali dan dipanaskan dulu, agar waktu start worker tidak ikut diukur
+    with precompute.ranking_pool(workers) as pool:
+        rank_all_cities(pool)
+        rank_parallel_seconds = time_call(lambda: rank_all_cities(pool), repeat)
+
+    result = {
+        'rows': n_rows,
+        'cities': int(data['City'].nunique()),
+        'seconds': {
+            'load_csv': load_seconds,
+            'load_csv_streaming': load_streaming_seconds,
+            'critic': time_call(lambda: app_module.critic_weight(numerical_data), repeat),
+            'vikor': time_call(lambda: app_module.vikor_method(numerical_data, weights, app_module.BENEFIT_CRITERIA), repeat),
+            'warm_cache': warm_cache_seconds,
+            'rank_all_cities_serial': rank_serial_seconds,
+            'rank_all_cities_parallel': rank_parallel_seconds,
+            'city_selection_cached': time_call(lambda: post(city_form), repeat),
+            'all_cities_cached': time_call(lambda: post(all_form), repeat),
+            'new_data': time_call(lambda: post(new_data_form), repeat),
+            'city_selection_cold': time_call(cold_city_selection, repeat),
+        },
+        'rank_all_cities': {'workers': workers, 'speedup': rank_serial_seconds / rank_parallel_seconds},
+    }
+
+    app_module.install_dataset(data, warm=True)
+    result['peak_memory_bytes'] = {
+        **load_memory,
+        'critic': peak_memory(lambda: app_module.critic_weight(numerical_data)),
+        'vikor': peak_memory(lambda: app_module.vikor_method(numerical_data, weights, app_module.BENEFIT_CRITERIA)),
+        'city_selection_cached': peak_memory(lambda: post(city_form)),
+        'new_data': peak_memory(lambda: post(new_data_form)),
+        'city_selection_cold': peak_memory(cold_city_selection),
+    }
+    return result
+
+
+# --- Perbandingan Hasil ---
+def compare_results(current, baseline, threshold):
+    """Daftar metrik yang lebih lambat/lebih boros dari baseline dengan rasio > threshold."""
+    baseline_cases = {(case['rows'], case['cities']): case for case in baseline.get('results', [])}
+    regressions = []
+    for case in current['results']:
+        previous = baseline_cases.get((case['rows'], case['cities']))
+        if previous is None:
+            continue
+        for group in ('seconds', 'peak_memory_bytes'):
+            for metric, value in case.get(group, {}).items():
+                old_value = previous.get(group, {}).get(metric)
+                if not old_value or value is None:
+                    continue
+                ratio = value / old_value
+                if ratio > threshold:
+                    regressions.append({
+                        'rows': case['rows'], 'cities': case['cities'], 'metric': f"{group}.{metric}",
+                        'baseline': old_value, 'current': value, 'ratio': ratio,
+                    })
+    return regressions
+
+def _int_list(text):
+    return [int(float(item)) for item in text.split(',') if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DESTINA CRITIC/VIKOR ranking pipeline.")
+    parser.add_argument('--sizes', type=_int_list, default=DEFAULT_SIZES, help="Comma-separated row counts (default: 100,...,1000000).")
+    parser.add_argument('--cities', type=_int_list, default=DEFAULT_CITY_COUNTS, help="Comma-separated city counts (default: 5,50).")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions per timing; the median is reported.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results.")
+    parser.add_argument('--compare', help="Previous results JSON to compare against.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes for the parallel rank_all_cities timing.")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Ratio above which a metric counts as a regression.")
+    args = parser.parse_args(argv)
+
+    import app as app_module # Diimpor di sini agar --help tidak ikut memuat dataset
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'workers': args.workers,
+        },
+        'results': [],
+    }
+    for n_rows in args.sizes:
+        for n_cities in args.cities:
+            print(f"Benchmarking {n_rows} rows, {n_cities} cities...", flush=True)
+            case = benchmark_case(app_module, n_rows, n_cities, args.repeat, seed=args.seed, workers=args.workers)
+            report['results'].append(case)
+            print("  " + ", ".join(f"{name}={seconds * 1000:.2f} ms" for name, seconds in case['seconds'].items()), flush=True)
+            print(f"  rank_all_cities speedup with {args.workers} workers: x{case['rank_all_cities']['speedup']:.2f}", flush=True)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(report, json.load(f), args.threshold)
+        report['comparison'] = {'baseline': args.compare, 'threshold': args.threshold, 'regressions': regressions}
+        for item in regressions:
+            print(f"REGRESSION {item['metric']} ({item['rows']} rows, {item['cities']} cities): "
+                  f"{item['baseline']:.6g} -> {item['current']:.6g} (x{item['ratio']:.2f})")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to '{args.output}'.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,426 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+from collections import namedtuple
+from pandas.api.types import union_categoricals
+
+import geo
+import mcdm
+
+# --- Memuat dan Membersihkan Data ---
+DATA_FILE = 'tourism_data_updated.csv'
+
+def dataset_fingerprint(path=DATA_FILE):
+    """
+    Sidik jari versi dataset (mtime + ukuran file). Berubah setiap kali CSV diganti,
+    sehingga cache ranking tahu kapan harus dibuang.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_dataset(path=DATA_FILE):
+    df = pd.read_csv(path)
+    print(f"File '{path}' berhasil dimuat.")
+
+    # Konversi 'yes'/'no' ke 1/0 untuk kolom fasilitas
+    if 'Toilet_Availability' in df.columns:
+        df['Toilet_Availability_Display'] = df['Toilet_Availability'].astype(str).str.lower()
+        df['Toilet_Availability'] = df['Toilet_Availability'].astype(str).str.lower().map({'yes': 1, 'no': 0}).fillna(0)
+    else:
+        print("WARNING: Column 'Toilet_Availability' not found.")
+        df['Toilet_Availability'] = 0
+        df['Toilet_Availability_Display'] = 'no'
+
+    if 'Parking_Availability' in df.columns:
+        df['Parking_Availability_Display'] = df['Parking_Availability'].astype(str).str.lower()
+        df['Parking_Availability'] = df['Parking_Availability'].astype(str).str.lower().map({'yes': 1, 'no': 0}).fillna(0)
+    else:
+        print("WARNING: Column 'Parking_Availability' not found.")
+        df['Parking_Availability'] = 0
+        df['Parking_Availability_Display'] = 'no'
+
+    # Pastikan kolom numerik utama adalah numerik dan NaN diisi
+    for col_name, default_val in [
+        ('Accessibility_Score', 5), 
+        ('Price', df['Price'].median() if 'Price' in df.columns and not df['Price'].empty else 0), 
+        ('Rating', df['Rating'].mean() if 'Rating' in df.columns and not df['Rating'].empty else 3),
+        ('Time_Minutes', df['Time_Minutes'].mean() if 'Time_Minutes' in df.columns and not df['Time_Minutes'].empty else 60) # Kembalikan Time_Minutes
+    ]:
+        if col_name in df.columns:
+            df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
+            if df[col_name].isnull().any():
+                fill_value = default_val if pd.isna(default_val) or not callable(default_val) else default_val() # Handle jika default adalah fungsi
+                df[col_name] = df[col_name].fillna(fill_value)
+        else:
+            print(f"WARNING: Column '{col_name}' not found. Using default value: {default_val}")
+            df[col_name] = default_val
+
+    return df
+
+
+# --- Ingest Streaming untuk Dataset Besar ---
+# CSV dibaca per chunk; setiap chunk langsung dibersihkan seperti load_dataset() dan diubah ke
+# dtype ringkas (float32 untuk kriteria, uint8 untuk fasilitas, categorical untuk kolom kategori),
+# sehingga frame teks mentah tidak pernah dimuat utuh. Nilai isi NaN dihitung dalam lintasan yang
+# sama: rata-rata lewat jumlah berjalan, median dari sampel acak berukuran tetap (tepat selama
+# jumlah data <= MEDIAN_SAMPLE_SIZE). Statistik cukup CRITIC ikut diakumulasi per chunk dan
+# disimpan di df.attrs['criteria_stats'] sebagai (kolom, CriteriaStats).
+STREAM_CHUNK_ROWS = 100000
+STREAMING_THRESHOLD_BYTES = 64 << 20 # CSV sebesar ini atau lebih dimuat dengan load_dataset_streaming()
+MEDIAN_SAMPLE_SIZE = 1 << 16
+
+FACILITY_COLUMNS = ['Toilet_Availability', 'Parking_Availability']
+# Cara mengisi NaN per kolom numerik ('median'/'mean' dari data, atau konstanta),
+# dan nilai default jika kolomnya tidak ada sama sekali (sama seperti load_dataset())
+NUMERIC_FILLS = {'Accessibility_Score': 5, 'Price': 'median', 'Rating': 'mean', 'Time_Minutes': 'mean'}
+MISSING_COLUMN_DEFAULTS = {'Accessibility_Score': 5, 'Price': 0, 'Rating': 3, 'Time_Minutes': 60}
+STATS_COLUMNS = ['Price', 'Rating', 'Accessibility_Score', 'Toilet_Availability', 'Parking_Availability', 'Time_Minutes']
+
+StreamingSummary = namedtuple('StreamingSummary', ['rows', 'chunks', 'fill_values', 'stats_columns', 'stats'])
+
+class _MedianSample:
+    """Sampel acak seragam berukuran tetap (bottom-k dari kunci acak) untuk memperkirakan median."""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.values = np.empty(0)
+        self.keys = np.empty(0)
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        keys = np.concatenate([self.keys, self.rng.random(len(values))])
+        values = np.concatenate([self.values, values])
+        if len(values) > self.size:
+            keep = np.argpartition(keys, self.size - 1)[:self.size]
+            keys, values = keys[keep], values[keep]
+        self.keys, self.values = keys, values
+
+    def median(self):
+        return float(np.median(self.values)) if len(self.values) else np.nan
+
+def _compact_chunk(chunk, numeric_columns):
+    """Membersihkan satu chunk seperti load_dataset() dan mengubahnya ke dtype ringkas (NaN belum diisi)."""
+    data, displays = {}, {}
+    for col in chunk.columns:
+        if col in FACILITY_COLUMNS:
+            lowered = chunk[col].astype(str).str.lower()
+            data[col] = lowered.map({'yes': 1, 'no': 0}).fillna(0).to_numpy(dtype=np.uint8)
+            displays[f"{col}_Display"] = lowered.astype('category')
+        elif col in numeric_columns:
+            data[col] = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float32)
+        elif col in CATEGORICAL_COLUMNS:
+            data[col] = chunk[col].astype('category')
+        else:
+            data[col] = chunk[col].to_numpy()
+    data.update(displays) # Kolom tampilan ditambahkan di akhir, urutannya sama seperti load_dataset()
+    return data
+
+def _concat_column(parts):
+    if isinstance(parts[0], pd.Series) and isinstance(parts[0].dtype, pd.CategoricalDtype):
+        return union_categoricals(parts, sort_categories=True)
+    return np.concatenate([np.asarray(part) for part in parts])
+
+def load_dataset_streaming(path=DATA_FILE, chunksize=STREAM_CHUNK_ROWS):
+    """
+    Versi streaming dari load_dataset() untuk CSV besar: hasilnya sama (dengan dtype ringkas),
+    ditambah StreamingSummary berisi nilai isi NaN dan statistik cukup kriteria.
+    Mengembalikan (DataFrame, StreamingSummary).
+    """
+    numeric_columns = list(NUMERIC_FILLS)
+    parts = {}
+    columns = None
+    samples = {col: _MedianSample(MEDIAN_SAMPLE_SIZE) for col, fill in NUMERIC_FILLS.items() if fill == 'median'}
+    sums = {col: [0.0, 0] for col, fill in NUMERIC_FILLS.items() if fill == 'mean'}
+    accumulator = None
+    n_chunks = 0
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        data = _compact_chunk(chunk, numeric_columns)
+        if columns is None:
+            columns = list(data)
+            stats_columns = [col for col in STATS_COLUMNS if col in data]
+            accumulator = mcdm.StreamingStatsAccumulator(len(stats_columns))
+        for col, values in data.items():
+            parts.setdefault(col, []).append(values)
+        for col, sample in samples.items():
+            if col in data:
+                sample.update(data[col].astype(float))
+        for col, total in sums.items():
+            if col in data:
+                total[0] += np.nansum(data[col], dtype=float)
+                total[1] += int(np.count_nonzero(~np.isnan(data[col])))
+        accumulator.update(np.column_stack([data[col] for col in stats_columns]))
+        n_chunks += 1
+    print(f"File '{path}' berhasil dimuat ({n_chunks} chunk).")
+
+    if columns is None: # CSV tanpa baris data
+        return load_dataset(path), StreamingSummary(0, 0, {}, [], None)
+
+    df = pd.DataFrame({col: _concat_column(parts.pop(col)) for col in columns}, copy=False)
+
+    for col in FACILITY_COLUMNS:
+        if col not in df.columns:
+            print(f"WARNING: Column '{col}' not found.")
+            df[col] = np.zeros(len(df), dtype=np.uint8)
+            df[f"{col}_Display"] = pd.Categorical(np.full(len(df), 'no'))
+
+    fill_values = {}
+    for col, fill in NUMERIC_FILLS.items():
+        if col not in df.columns:
+            print(f"WARNING: Column '{col}' not found. Using default value: {MISSING_COLUMN_DEFAULTS[col]}")
+            df[col] = np.full(len(df), MISSING_COLUMN_DEFAULTS[col], dtype=np.float32)
+            continue
+        if fill == 'median':
+            fill_values[col] = samples[col].median()
+        elif fill == 'mean':
+            total, count = sums[col]
+            fill_values[col] = float(total / count) if count else np.nan
+        else:
+            fill_values[col] = float(fill)
+        values = df[col].to_numpy()
+        if not np.isnan(fill_values[col]) and np.isnan(values).any():
+            df[col] = np.where(np.isnan(values), np.float32(fill_values[col]), values)
+
+    # Statistik hanya mencakup kolom kriteria yang ada di CSV; None jika ada kolom yang seluruhnya kosong
+    stats = None
+    if all(not np.isnan(fill_values.get(col, 0.0)) for col in stats_columns):
+        stats = accumulator.finalize([np.float32(fill_values.get(col, 0.0)) for col in stats_columns])
+    df.attrs['criteria_stats'] = (tuple(stats_columns), stats) if stats is not None else None
+    return df, StreamingSummary(len(df), n_chunks, fill_values, stats_columns, stats)
+
+def _load_csv(csv_path):
+    """Memuat CSV dengan load_dataset(), atau load_dataset_streaming() jika file-nya besar."""
+    if os.path.getsize(csv_path) >= STREAMING_THRESHOLD_BYTES:
+        return load_dataset_streaming(csv_path)[0], 'csv-stream'
+    return load_dataset(csv_path), 'csv'
+
+
+# --- Koordinat Destinasi ---
+# Lat/Long hanya ada di tourism_with_id.csv; digabung ke dataset lewat Place_Id. Snapshot
+# menyimpan hasil gabungan ini sebagai kolom Lat/Long, jadi CSV-nya hanya dibaca tanpa snapshot.
+COORDINATES_FILE = 'tourism_with_id.csv'
+COORDINATE_COLUMNS = ['Lat', 'Long']
+
+def load_coordinates(df, path=COORDINATES_FILE):
+    """
+    Array (lat, lon) yang sejajar dengan baris df: dari kolom Lat/Long df jika ada (snapshot),
+    selain itu diambil dari `path` berdasarkan Place_Id. Destinasi tanpa koordinat bernilai NaN.
+    None jika file atau kolomnya tidak tersedia.
+    """
+    if all(col in df.columns for col in COORDINATE_COLUMNS):
+        return tuple(pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) for col in COORDINATE_COLUMNS)
+    if 'Place_Id' not in df.columns:
+        return None
+    try:
+        coordinates = pd.read_csv(path, usecols=['Place_Id', 'Lat', 'Long']).drop_duplicates('Place_Id')
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Coordinates could not be loaded from '{path}': {e}")
+        return None
+    coordinates = coordinates.set_index('Place_Id').reindex(df['Place_Id'].to_numpy())
+    return (pd.to_numeric(coordinates['Lat'], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(coordinates['Long'], errors='coerce').to_numpy(dtype=float))
+
+
+# --- Dataset Read-only untuk Jalur Request ---
+# Dibangun sekali per versi dataset lalu dibagi oleh semua request tanpa disalin:
+#   matrix     -> matriks float kriteria (n x kriteria), C-contiguous, read-only
+#   valid_rows -> mask baris tanpa NaN di kriteria
+#   city_rows  -> posisi baris per kota (termasuk 'All'), terurut naik
+#   columns    -> kolom tampilan sebagai array terpisah, diindeks hanya untuk baris yang ditampilkan
+#   geo_index  -> indeks spasial grid atas koordinat destinasi (None tanpa koordinat), lihat geo.py
+#   criteria_stats -> statistik cukup seluruh matrix dari ingest streaming (None jika tidak tersedia)
+#   place_index -> (Place_Id terurut, posisi barisnya) untuk place_positions() (None tanpa kolom Place_Id)
+DatasetStore = namedtuple('DatasetStore', ['criteria', 'matrix', 'valid_rows', 'city_rows', 'columns', 'n_rows', 'geo_index', 'criteria_stats', 'place_index'])
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+def build_dataset_store(df, criteria, coordinates=None):
+    """
+    Membangun DatasetStore dari DataFrame yang sudah dibersihkan load_dataset().
+    `coordinates` adalah (lat, lon) dari load_coordinates(); tanpa itu geo_index bernilai None.
+    """
+    n_rows = len(df)
+    if all(c in df.columns for c in criteria):
+        matrix = np.empty((n_rows, len(criteria)), dtype=float)
+        for position, col in enumerate(criteria):
+            matrix[:, position] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        valid_rows = ~np.isnan(matrix).any(axis=1)
+    else:
+        matrix, valid_rows = None, np.zeros(n_rows, dtype=bool)
+
+    # Statistik dari load_dataset_streaming() dipakai ulang jika kolomnya sama dan semua baris valid
+    streamed = df.attrs.get('criteria_stats')
+    criteria_stats = streamed[1] if streamed is not None and streamed[0] == tuple(criteria) and valid_rows.all() else None
+
+    city_rows = {'All': np.arange(n_rows)}
+    if 'City' in df.columns:
+        for city, rows in df.groupby('City', sort=False, observed=True).indices.items():
+            city_rows[city] = rows
+    columns = {col: np.asarray(df[col].to_numpy(dtype=object) if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].to_numpy())
+               for col in df.columns}
+
+    return DatasetStore(
+        criteria=tuple(criteria),
+        matrix=_read_only(matrix) if matrix is not None else None,
+        valid_rows=_read_only(valid_rows),
+        city_rows={city: _read_only(rows) for city, rows in city_rows.items()},
+        columns={col: _read_only(values) for col, values in columns.items()},
+        n_rows=n_rows,
+        geo_index=geo.build_geo_index(*coordinates) if coordinates is not None else None,
+        criteria_stats=criteria_stats,
+        place_index=_place_index(columns['Place_Id']) if 'Place_Id' in columns else None,
+    )
+
+def _place_index(place_ids):
+    order = np.argsort(place_ids, kind='stable')
+    return _read_only(place_ids[order]), _read_only(order)
+
+def place_positions(store, place_ids):
+    """Posisi baris dataset untuk setiap Place_Id (-1 jika tidak ada di dataset)."""
+    place_ids = np.asarray(place_ids)
+    if store.place_index is None or store.n_rows == 0:
+        return np.full(len(place_ids), -1, dtype=np.intp)
+    sorted_ids, order = store.place_index
+    found = np.clip(np.searchsorted(sorted_ids, place_ids), 0, store.n_rows - 1)
+    return np.where(sorted_ids[found] == place_ids, order[found], -1)
+
+
+# --- Snapshot Kolumnar ---
+# Hasil load_dataset() disimpan sebagai satu file .npy per kolom (bisa di-memory-map) di dalam
+# SNAPSHOT_DIR, ditambah manifest.json. Kolom teks disimpan dengan dictionary encoding
+# (kode integer + daftar kategori). Koordinat dari COORDINATES_FILE ikut disimpan sebagai kolom
+# Lat/Long. Snapshot dianggap segar selama ukuran dan hash SHA-256 kedua CSV sumber sama dengan
+# yang tercatat di manifest.
+SNAPSHOT_DIR = 'tourism_data_updated.snapshot'
+SNAPSHOT_FORMAT_VERSION = 2
+CATEGORICAL_COLUMNS = ['City', 'Category', 'Toilet_Availability_Display', 'Parking_Availability_Display']
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _code_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _source_info(path):
+    """Nama, ukuran dan hash SHA-256 file sumber untuk manifest; None jika file tidak ada."""
+    if not os.path.exists(path):
+        return None
+    return {'source': os.path.basename(path), 'source_size': os.path.getsize(path), 'source_sha256': file_sha256(path)}
+
+def build_snapshot(csv_path=DATA_FILE, snapshot_dir=SNAPSHOT_DIR, coordinates_path=COORDINATES_FILE):
+    """Membersihkan CSV sekali, menggabungkan koordinatnya, lalu menulis snapshot kolumnar ke snapshot_dir."""
+    df, _ = _load_csv(csv_path)
+    coordinates = load_coordinates(df, coordinates_path)
+    if coordinates is not None:
+        df = df.assign(**dict(zip(COORDINATE_COLUMNS, coordinates)))
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    columns = []
+    for position, col in enumerate(df.columns):
+        file_stem = f"col{position}"
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            np.save(os.path.join(snapshot_dir, f"{file_stem}.npy"), series.to_numpy())
+            columns.append({'name': col, 'kind': 'numeric', 'file': f"{file_stem}.npy"})
+        else:
+            codes, categories = pd.factorize(series.astype(object), sort=col in CATEGORICAL_COLUMNS)
+            categories = np.asarray(categories, dtype=str)
+            np.save(os.path.join(snapshot_dir, f"{file_stem}.npy"), codes.astype(_code_dtype(len(categories))))
+            np.save(os.path.join(snapshot_dir, f"{file_stem}_categories.npy"), categories)
+            columns.append({
+                'name': col,
+                'kind': 'categorical' if col in CATEGORICAL_COLUMNS else 'text',
+                'file': f"{file_stem}.npy",
+                'categories_file': f"{file_stem}_categories.npy",
+            })
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        **_source_info(csv_path),
+        'coordinates': _source_info(coordinates_path), # None: snapshot dibuat tanpa file koordinat
+        'rows': len(df),
+        'columns': columns,
+    }
+    with open(os.path.join(snapshot_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Snapshot '{snapshot_dir}' berhasil dibuat ({len(df)} rows, {len(columns)} columns).")
+    return manifest
+
+def _read_manifest(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _source_matches(path, info):
+    if info is None:
+        return not os.path.exists(path)
+    try:
+        if os.path.getsize(path) != info['source_size']:
+            return False
+        return file_sha256(path) == info['source_sha256']
+    except OSError:
+        return False
+
+def snapshot_is_fresh(csv_path=DATA_FILE, snapshot_dir=SNAPSHOT_DIR, coordinates_path=COORDINATES_FILE):
+    """True jika snapshot ada, formatnya dikenali, dan dibuat dari isi CSV dan file koordinat yang sama."""
+    manifest = _read_manifest(snapshot_dir)
+    if manifest is None or manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        return False
+    return _source_matches(csv_path, manifest) and _source_matches(coordinates_path, manifest.get('coordinates'))
+
+def load_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    """Memuat snapshot; kolom numerik di-memory-map (read-only) tanpa parsing teks."""
+    manifest = _read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Snapshot manifest not found in '{snapshot_dir}'.")
+
+    data = {}
+    for column in manifest['columns']:
+        values = np.load(os.path.join(snapshot_dir, column['file']), mmap_mode='r')
+        if column['kind'] == 'numeric':
+            data[column['name']] = values
+            continue
+        categories = np.load(os.path.join(snapshot_dir, column['categories_file'])).astype(object)
+        if column['kind'] == 'categorical':
+            data[column['name']] = pd.Categorical.from_codes(np.asarray(values), categories=categories)
+        else:
+            decoded = np.where(values >= 0, categories[np.clip(values, 0, None)], np.nan) if len(categories) else np.full(len(values), np.nan, dtype=object)
+            data[column['name']] = decoded
+    return pd.DataFrame(data, copy=False)
+
+def load_dataset_fast(csv_path=DATA_FILE, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Memuat dataset dari snapshot jika ada dan masih segar, jika tidak dari CSV (streaming per
+    chunk untuk file besar). Mengembalikan (DataFrame, sumber) dengan sumber 'snapshot', 'csv'
+    atau 'csv-stream'.
+    """
+    if snapshot_is_fresh(csv_path, snapshot_dir):
+        try:
+            return load_snapshot(snapshot_dir), 'snapshot'
+        except Exception as e:
+            print(f"WARNING: Snapshot '{snapshot_dir}' could not be loaded, falling back to CSV: {e}")
+    return _load_csv(csv_path)
+
+
+if __name__ == '__main__':
+    # Langkah build: python dataset.py
+    build_snapshot()
+    import search # Indeks teks disimpan di samping dataset; diimpor di sini karena search.py mengimpor modul ini
+    search.build_search_index_file()
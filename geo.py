@@ -0,0 +1,106 @@
+import numpy as np
+from collections import namedtuple
+
+# --- Indeks Spasial Grid untuk Pencarian "Di Dekat Saya" ---
+# Setiap destinasi dimasukkan ke sel grid berukuran CELL_DEGREES x CELL_DEGREES derajat.
+# Titik diurutkan berdasarkan kunci sel (baris lintang lalu kolom bujur), sehingga satu baris
+# sel pada kotak pencarian adalah satu potongan kontigu yang ditemukan dengan searchsorted.
+# Biaya query sebanding dengan jumlah sel dan kandidat di sekitar titik, bukan jumlah destinasi.
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.1 # Sekitar 11 km di khatulistiwa
+
+# Jumlah kolom bujur per baris lintang dalam kunci sel
+_LON_CELLS = 1 << 24
+
+GeoIndex = namedtuple('GeoIndex', ['cell_keys', 'lat', 'lon', 'positions', 'cell_degrees'])
+
+def haversine_km(lat, lon, lat_points, lon_points):
+    """Jarak lingkaran besar (km) dari satu titik ke array titik."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat_points, lon_points = np.radians(lat_points), np.radians(lon_points)
+    a = (np.sin((lat_points - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lat_points) * np.sin((lon_points - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def _cell_rows(lat, cell_degrees):
+    return np.floor(np.asarray(lat, dtype=float) / cell_degrees).astype(np.int64)
+
+def _cell_cols(lon, cell_degrees):
+    return np.floor(np.asarray(lon, dtype=float) / cell_degrees).astype(np.int64) + _LON_CELLS // 2
+
+def build_geo_index(lat, lon, cell_degrees=CELL_DEGREES):
+    """
+    Membangun GeoIndex dari array Lat/Long yang sejajar dengan baris dataset.
+    Baris dengan koordinat kosong atau di luar rentang tidak dimasukkan ke indeks.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    positions = np.flatnonzero(valid)
+
+    keys = _cell_rows(lat[positions], cell_degrees) * _LON_CELLS + _cell_cols(lon[positions], cell_degrees)
+    order = np.argsort(keys, kind='stable')
+    return GeoIndex(keys[order], lat[positions][order], lon[positions][order], positions[order], cell_degrees)
+
+def _lon_ranges(lon, delta_lon):
+    """Rentang bujur kotak pencarian; dipecah dua jika melewati antimeridian (+-180)."""
+    lon_low, lon_high = lon - delta_lon, lon + delta_lon
+    if lon_high - lon_low >= 360:
+        return [(-180.0, 180.0)]
+    if lon_low < -180:
+        return [(-180.0, lon_high), (lon_low + 360, 180.0)]
+    if lon_high > 180:
+        return [(lon_low, 180.0), (-180.0, lon_high - 360)]
+    return [(lon_low, lon_high)]
+
+def _candidates(index, lat, lon, radius_km):
+    """Indeks (di dalam GeoIndex) titik-titik pada sel yang beririsan dengan kotak radius."""
+    delta_lat = np.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_low, lat_high = max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0)
+    widest = max(abs(lat_low), abs(lat_high))
+    if widest >= 89.9 or delta_lat >= 45:
+        lon_ranges = [(-180.0, 180.0)]
+    else:
+        lon_ranges = _lon_ranges(lon, delta_lat / np.cos(np.radians(widest)))
+
+    rows = np.arange(_cell_rows(lat_low, index.cell_degrees), _cell_rows(lat_high, index.cell_degrees) + 1)
+    parts = []
+    for lon_low, lon_high in lon_ranges:
+        col_low, col_high = _cell_cols(lon_low, index.cell_degrees), _cell_cols(lon_high, index.cell_degrees)
+        starts = np.searchsorted(index.cell_keys, rows * _LON_CELLS + col_low, side='left')
+        ends = np.searchsorted(index.cell_keys, rows * _LON_CELLS + col_high, side='right')
+        parts += [np.arange(start, end) for start, end in zip(starts, ends) if end > start]
+    if not parts:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.concatenate(parts)
+    # Dua rentang bisa berbagi satu sel di sisi yang berseberangan jika kotaknya hampir 360 derajat
+    return np.unique(candidates) if len(lon_ranges) > 1 else candidates
+
+def query_radius(index, lat, lon, radius_km):
+    """
+    Destinasi dalam radius_km dari (lat, lon), terurut dari yang terdekat.
+    Mengembalikan (posisi baris dataset, jarak km).
+    """
+    candidates = _candidates(index, lat, lon, radius_km)
+    distances = haversine_km(lat, lon, index.lat[candidates], index.lon[candidates])
+    inside = distances <= radius_km
+    candidates, distances = candidates[inside], distances[inside]
+    order = np.argsort(distances, kind='stable')
+    return index.positions[candidates[order]], distances[order]
+
+def query_nearest(index, lat, lon, k):
+    """
+    k destinasi terdekat dari (lat, lon), terurut dari yang terdekat. Radius pencarian
+    dimulai dari satu sel dan digandakan sampai minimal k titik ditemukan.
+    Mengembalikan (posisi baris dataset, jarak km).
+    """
+    k = min(k, len(index.positions))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    radius_km = np.radians(index.cell_degrees) * EARTH_RADIUS_KM
+    while True:
+        positions, distances = query_radius(index, lat, lon, radius_km)
+        if len(positions) >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+            return positions[:k], distances[:k]
+        radius_km *= 2
@@ -1,3 +1,5 @@
+import numpy as np
+
 def format_angka_tampilan(nilai, maks_desimal=4, presisi_untuk_angka_kecil=6):
     """
     Memformat angka untuk tampilan:
@@ -26,4 +28,69 @@ def format_angka_tampilan(nilai, maks_desimal=4, presisi_untuk_angka_kecil=6):
     if nilai_dibulatkan_standar == int(nilai_dibulatkan_standar):
         return str(int(nilai_dibulatkan_standar))
     else:
-        return f"{nilai_dibulatkan_standar:.{maks_desimal}f}".rstrip('0').rstrip('.')
\ No newline at end of file
+        return f"{nilai_dibulatkan_standar:.{maks_desimal}f}".rstrip('0').rstrip('.')
+
+
+def _format_desimal_batch(nilai, desimal):
+    # '%.Nf' membulatkan dengan cara yang sama seperti round(nilai, N) lalu f"{...:.Nf}"
+    teks = np.char.mod(f"%.{desimal}f", nilai)
+    if desimal > 0:
+        teks = np.char.rstrip(np.char.rstrip(teks, '0'), '.')
+    return teks
+
+def format_angka_tampilan_batch(nilai, maks_desimal=4, presisi_untuk_angka_kecil=6):
+    """
+    Versi array dari format_angka_tampilan: menerima array angka dan mengembalikan array string
+    dengan hasil yang sama persis per elemen (termasuk presisi tambahan untuk angka sangat kecil
+    dan penghapusan nol di akhir). NaN/inf ditampilkan sebagai 'nan'/'inf'.
+    """
+    nilai = np.asarray(nilai, dtype=float)
+    epsilon_untuk_nol = 1e-9
+
+    hasil_standar = _format_desimal_batch(nilai, maks_desimal)
+    # Angka yang menjadi nol setelah pembulatan standar memakai presisi yang lebih tinggi
+    jadi_nol = np.isin(hasil_standar, ['0', '-0'])
+    if jadi_nol.any():
+        presisi_efektif = max(maks_desimal, presisi_untuk_angka_kecil)
+        hasil_kecil = _format_desimal_batch(nilai, presisi_efektif)
+        hasil_kecil = np.where(np.isin(hasil_kecil, ['', '-0']), '0', hasil_kecil)
+        hasil_standar = np.where(jadi_nol, hasil_kecil, hasil_standar)
+
+    return np.where(np.abs(nilai) < epsilon_untuk_nol, '0', hasil_standar)
+
+def format_rupiah_batch(nilai):
+    """
+    Memformat array harga menjadi 'Rp 1.234.567' (dibulatkan ke bawah menuju nol seperti int()),
+    sama dengan f"Rp {int(x):,.0f}".replace(',', '.') per elemen.
+    """
+    bilangan = np.trunc(np.asarray(nilai, dtype=float)).astype(np.int64)
+    mutlak = np.abs(bilangan)
+
+    # Pecah menjadi kelompok 3 digit (dari kanan); loop hanya per kelompok, bukan per elemen
+    kelompok = [mutlak % 1000]
+    jumlah_kelompok = np.ones(mutlak.shape, dtype=int)
+    sisa = mutlak // 1000
+    while (sisa > 0).any():
+        kelompok.append(sisa % 1000)
+        jumlah_kelompok += sisa > 0
+        sisa = sisa // 1000
+
+    hasil = np.full(mutlak.shape, '', dtype=str)
+    for posisi in reversed(range(len(kelompok))):
+        # Kelompok paling kiri tanpa nol di depan, kelompok berikutnya '.ddd'
+        bagian = np.where(jumlah_kelompok - 1 == posisi, np.char.mod('%d', kelompok[posisi]),
+                          np.where(jumlah_kelompok - 1 > posisi, np.char.add('.', np.char.mod('%03d', kelompok[posisi])), ''))
+        hasil = np.char.add(hasil, bagian)
+    return np.char.add(np.where(bilangan < 0, 'Rp -', 'Rp '), hasil)
+
+def hitung_bintang_rating(rating):
+    """
+    Menghitung jumlah bintang penuh, setengah dan kosong (total 5) untuk array rating:
+    pecahan >= 0.75 dibulatkan ke bintang penuh, >= 0.25 menjadi setengah bintang.
+    """
+    rating = np.asarray(rating, dtype=float)
+    bintang_penuh = np.trunc(rating).astype(int)
+    pecahan = rating - bintang_penuh
+    setengah_bintang = ((pecahan >= 0.25) & (pecahan < 0.75)).astype(int)
+    bintang_penuh = bintang_penuh + (pecahan >= 0.75)
+    return bintang_penuh, setengah_bintang, 5 - bintang_penuh - setengah_bintang
@@ -0,0 +1,237 @@
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import g, has_request_context, request, Response # type: ignore
+
+# --- Instrumentasi per Request ---
+# Semua fitur opt-in lewat environment variable:
+#   DESTINA_TIMING=1                 -> durasi per tahap dikirim di header Server-Timing
+#   DESTINA_METRICS=1                -> endpoint /metrics (histogram per tahap dan per kota, format Prometheus)
+#   DESTINA_PROFILE_THRESHOLD_MS=500 -> sampling profiler; request di atas ambang ini di-dump ke DESTINA_PROFILE_DIR
+# Jika semuanya mati, stage() mengembalikan context manager kosong yang sama setiap kali,
+# jadi biaya di jalur request hanya satu pemanggilan fungsi.
+
+TIMING_ENABLED = os.environ.get('DESTINA_TIMING', '0') == '1'
+METRICS_ENABLED = os.environ.get('DESTINA_METRICS', '0') == '1'
+PROFILE_THRESHOLD_MS = float(os.environ.get('DESTINA_PROFILE_THRESHOLD_MS', '0') or 0)
+PROFILE_INTERVAL_MS = float(os.environ.get('DESTINA_PROFILE_INTERVAL_MS', '5') or 5)
+PROFILE_DIR = os.environ.get('DESTINA_PROFILE_DIR', 'profiles')
+
+# Batas atas bucket histogram, dalam detik
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_recording = TIMING_ENABLED or METRICS_ENABLED
+
+
+class _NoopStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_STAGE = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'rows', 'started')
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.started
+        if has_request_context():
+            stages = g.setdefault('destina_stages', [])
+            stages.append((self.name, duration, self.rows))
+        return False
+
+
+def stage(name, rows=None):
+    """
+    Mengukur satu tahap pemrosesan request:
+        with stage('critic', rows=len(matrix)):
+            ...
+    `rows` (opsional) adalah jumlah baris yang diproses tahap tersebut.
+    """
+    if not _recording:
+        return _NOOP_STAGE
+    return _Stage(name, rows)
+
+def set_label(city):
+    """Label kota untuk histogram request ini (gunakan nilai dengan kardinalitas terbatas)."""
+    if _recording and has_request_context():
+        g.destina_city = city
+
+
+# --- Histogram ---
+class StageHistograms:
+    """Histogram durasi per (tahap, kota) beserta jumlah baris yang diproses."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage_name, city, duration, rows=None):
+        bucket_index = next((i for i, bound in enumerate(self.buckets) if duration <= bound), len(self.buckets))
+        with self._lock:
+            series = self._series.get((stage_name, city))
+            if series is None:
+                series = self._series[(stage_name, city)] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0, 'rows': 0}
+            series['buckets'][bucket_index] += 1
+            series['sum'] += duration
+            series['count'] += 1
+            series['rows'] += rows or 0
+
+    def render_prometheus(self):
+        """Teks exposition format Prometheus."""
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        lines = [
+            '# HELP destina_stage_duration_seconds Duration of each request processing stage.',
+            '# TYPE destina_stage_duration_seconds histogram',
+        ]
+        rows_lines = [
+            '# HELP destina_stage_rows_total Rows processed by each request processing stage.',
+            '# TYPE destina_stage_rows_total counter',
+        ]
+        with self._lock:
+            snapshot = {key: {'buckets': list(s['buckets']), 'sum': s['sum'], 'count': s['count'], 'rows': s['rows']}
+                        for key, s in self._series.items()}
+
+        for (stage_name, city), series in sorted(snapshot.items()):
+            labels = f'stage="{escape(stage_name)}",city="{escape(city)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['buckets']):
+                cumulative += count
+                lines.append(f'destina_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'destina_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f'destina_stage_duration_seconds_sum{{{labels}}} {series["sum"]}')
+            lines.append(f'destina_stage_duration_seconds_count{{{labels}}} {series["count"]}')
+            rows_lines.append(f'destina_stage_rows_total{{{labels}}} {series["rows"]}')
+        return '\n'.join(lines + rows_lines) + '\n'
+
+histograms = StageHistograms()
+
+
+# --- Sampling Profiler ---
+class SamplingProfiler:
+    """
+    Satu thread latar mengambil stack setiap thread request yang terdaftar setiap `interval`
+    detik. Hasilnya berupa collapsed stacks ("a;b;c jumlah"), bisa dibuka dengan
+    flamegraph.pl atau speedscope.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, thread_id):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='destina-sampler', daemon=True)
+                self._thread.start()
+
+    def unregister(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[_collapse_stack(frame)] += 1
+
+def _collapse_stack(frame, max_depth=128):
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def dump_profile(samples, duration):
+    """Menulis collapsed stacks satu request lambat ke PROFILE_DIR dan mengembalikan path-nya."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path_label = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+    # Komponen acak agar request lambat pada detik dan durasi yang sama tidak saling menimpa
+    file_name = f"{time.strftime('%Y%m%d-%H%M%S')}_{request.method}_{path_label}_{duration * 1000:.0f}ms_{uuid.uuid4().hex[:8]}.folded"
+    file_path = os.path.join(PROFILE_DIR, file_name)
+    with open(file_path, 'x') as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    return file_path
+
+profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000) if PROFILE_THRESHOLD_MS > 0 else None
+
+
+# --- Integrasi Flask ---
+def _before_request():
+    g.destina_started = time.perf_counter()
+    if profiler is not None:
+        profiler.register(threading.get_ident())
+
+def _after_request(response):
+    started = g.get('destina_started')
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    stages = g.get('destina_stages', [])
+
+    if TIMING_ENABLED:
+        entries = [f"{name};dur={duration * 1000:.3f}" for name, duration, _ in stages]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        response.headers['Server-Timing'] = ', '.join(entries)
+
+    if METRICS_ENABLED and request.endpoint != 'metrics':
+        city = g.get('destina_city', '')
+        for name, duration, rows in stages:
+            histograms.observe(name, city, duration, rows)
+        histograms.observe('total', city, total)
+
+    if profiler is not None:
+        samples = profiler.unregister(threading.get_ident())
+        if samples and total * 1000 >= PROFILE_THRESHOLD_MS:
+            file_path = dump_profile(samples, total)
+            print(f"Slow request {request.method} {request.path} took {total * 1000:.1f} ms; profile written to '{file_path}'.")
+    return response
+
+def _teardown_request(exc):
+    # Pastikan thread tidak tetap terdaftar jika request berakhir dengan exception
+    if profiler is not None:
+        profiler.unregister(threading.get_ident())
+
+def metrics():
+    return Response(histograms.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+def init_app(app):
+    """Memasang hook instrumentasi ke aplikasi Flask sesuai environment variable di atas."""
+    if not (_recording or profiler is not None):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if METRICS_ENABLED:
+        app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,365 @@
+import numpy as np
+from collections import namedtuple
+
+# --- Mesin CRITIC dan VIKOR berbasis ndarray ---
+# Semua fungsi menerima matriks float (n_alternatif x n_kriteria) yang sudah bersih (tanpa NaN)
+# dan bekerja sekaligus untuk semua kolom lewat broadcasting, tanpa loop per kolom
+# dan tanpa DataFrame perantara.
+
+EPSILON = 1e-9
+
+VikorResult = namedtuple('VikorResult', ['weights', 's', 'r', 'q'])
+
+def normalize(matrix):
+    """
+    Normalisasi min-max per kolom. Kolom yang semua nilainya sama menjadi 0.0,
+    sama seperti implementasi lama di app.py.
+    """
+    min_vals = matrix.min(axis=0)
+    range_vals = matrix.max(axis=0) - min_vals
+    normalized = (matrix - min_vals) / (range_vals + EPSILON)
+    return np.where(range_vals == 0, 0.0, normalized)
+
+def critic_weights_from_normalized(normalized):
+    """
+    Bobot CRITIC dari matriks yang sudah dinormalisasi:
+    c_j = std_j * sum_k (1 - korelasi_jk), lalu dibagi total c_j.
+    Korelasi dengan kolom ber-varians nol dianggap NaN dan dilewati (seperti pandas .corr()).
+    """
+    n_rows, n_cols = normalized.shape
+    if n_cols == 0:
+        return np.empty(0)
+    if n_rows <= 1:
+        return np.full(n_cols, 1 / n_cols)
+
+    centered = normalized - normalized.mean(axis=0)
+    sum_sq = np.einsum('ij,ij->j', centered, centered)
+    std_dev = np.sqrt(sum_sq / (n_rows - 1))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr_matrix = (centered.T @ centered) / np.sqrt(np.outer(sum_sq, sum_sq))
+    corr_matrix[~np.isfinite(corr_matrix)] = np.nan
+
+    c_j = std_dev * np.nansum(1 - corr_matrix, axis=0)
+    if c_j.sum() == 0:
+        return np.full(n_cols, 1 / n_cols)
+    return c_j / c_j.sum()
+
+def critic_weights(matrix):
+    """Bobot CRITIC langsung dari matriks kriteria mentah."""
+    if matrix.shape[0] <= 1:
+        return critic_weights_from_normalized(matrix)
+    return critic_weights_from_normalized(normalize(matrix))
+
+def vikor_distances(normalized, benefit_mask):
+    """|solusi ideal - nilai ter-normalisasi| per alternatif dan kriteria (sebelum dikalikan bobot)."""
+    ideal_positive = np.where(benefit_mask, normalized.max(axis=0), normalized.min(axis=0))
+    return np.abs(ideal_positive - normalized)
+
+def vikor_from_normalized(normalized, weights, benefit_mask, v=0.5):
+    """
+    Nilai S (utilitas grup), R (penyesalan individu) dan Q (solusi kompromi) VIKOR.
+    benefit_mask adalah array bool per kolom: True = benefit, False = cost.
+    """
+    terms = weights * vikor_distances(normalized, benefit_mask)
+
+    s_values = terms.sum(axis=1)
+    r_values = terms.max(axis=1, initial=0.0)
+
+    return VikorResult(weights, s_values, r_values, vikor_q(s_values, r_values, v))
+
+def vikor_q(s_values, r_values, v=0.5):
+    """Nilai Q dari S dan R seluruh alternatif (minimal satu)."""
+    s_star, s_minus = s_values.min(), s_values.max()
+    r_star, r_minus = r_values.min(), r_values.max()
+
+    q_s_component = (s_values - s_star) / ((s_minus - s_star) + EPSILON)
+    q_r_component = (r_values - r_star) / ((r_minus - r_star) + EPSILON)
+    return v * q_s_component + (1 - v) * q_r_component
+
+def vikor_scores(matrix, weights, benefit_mask, v=0.5):
+    """VIKOR dari matriks kriteria mentah dengan bobot yang sudah diketahui."""
+    return vikor_from_normalized(normalize(matrix), np.asarray(weights, dtype=float), np.asarray(benefit_mask, dtype=bool), v)
+
+def critic_vikor(matrix, benefit_mask, v=0.5):
+    """
+    CRITIC + VIKOR dalam satu lintasan: normalisasi dihitung sekali dan dipakai
+    untuk bobot maupun skor. Matriks minimal berisi satu baris.
+    Mengembalikan VikorResult(weights, s, r, q).
+    """
+    normalized = normalize(np.asarray(matrix, dtype=float))
+    weights = critic_weights_from_normalized(normalized)
+    return vikor_from_normalized(normalized, weights, np.asarray(benefit_mask, dtype=bool), v)
+
+def rank_positions(q_values):
+    """Peringkat (mulai dari 1) setiap alternatif berdasarkan Q; Q sama diurutkan sesuai posisi awal."""
+    order = np.argsort(q_values, kind='stable')
+    ranks = np.empty(len(q_values), dtype=np.int64)
+    ranks[order] = np.arange(1, len(q_values) + 1)
+    return ranks
+
+def top_k_order(q_values, k):
+    """
+    Indeks k alternatif dengan Q terkecil, terurut, tanpa mengurutkan seluruh array:
+    argpartition O(n) lalu hanya kandidat teratas yang diurutkan. Urutannya sama dengan
+    argsort stabil (Q sama diurutkan sesuai posisi awal), termasuk di batas ke-k.
+    """
+    n_values = len(q_values)
+    if k >= n_values:
+        return np.argsort(q_values, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth_value = q_values[np.argpartition(q_values, k - 1)[k - 1]]
+    candidates = np.flatnonzero(q_values <= kth_value)
+    return candidates[np.argsort(q_values[candidates], kind='stable')][:k]
+
+
+# --- Evaluasi Inkremental ("what-if") ---
+# Statistik cukup dataset dasar (jumlah, rata-rata, co-moment, min, max) memungkinkan bobot
+# CRITIC setelah penambahan satu baris dihitung dalam O(kriteria^2), tanpa menggabungkan
+# ulang seluruh data. Normalisasi min-max hanya menggeser dan menskala tiap kolom, sehingga
+# korelasi tidak berubah dan std ter-normalisasi = std mentah / (range + EPSILON).
+
+CriteriaStats = namedtuple('CriteriaStats', ['count', 'mean', 'comoment', 'min', 'max'])
+
+WhatIfResult = namedtuple('WhatIfResult', ['weights', 'q', 'rank', 'total'])
+
+# Jumlah baris per blok saat menilai ulang matriks dasar
+BLOCK_ROWS = 16384
+
+def criteria_stats(matrix):
+    """Statistik cukup untuk CRITIC dari matriks kriteria mentah."""
+    mean = matrix.mean(axis=0)
+    centered = matrix - mean
+    return CriteriaStats(len(matrix), mean, centered.T @ centered, matrix.min(axis=0), matrix.max(axis=0))
+
+def add_row_stats(stats, row):
+    """Memperbarui statistik untuk satu baris baru (update Welford multivariat, O(kriteria^2))."""
+    count = stats.count + 1
+    delta = row - stats.mean
+    mean = stats.mean + delta / count
+    comoment = stats.comoment + np.outer(delta, row - mean)
+    return CriteriaStats(count, mean, comoment, np.minimum(stats.min, row), np.maximum(stats.max, row))
+
+def merge_stats(first, second):
+    """Statistik gabungan dua kelompok baris yang terpisah (rumus paralel Chan, O(kriteria^2))."""
+    count = first.count + second.count
+    delta = second.mean - first.mean
+    mean = first.mean + delta * (second.count / count)
+    comoment = first.comoment + second.comoment + np.outer(delta, delta) * (first.count * second.count / count)
+    return CriteriaStats(count, mean, comoment, np.minimum(first.min, second.min), np.maximum(first.max, second.max))
+
+def critic_weights_from_stats(stats):
+    """Bobot CRITIC dari statistik cukup; setara dengan critic_weights pada data yang sama."""
+    n_cols = len(stats.mean)
+    if n_cols == 0:
+        return np.empty(0)
+    if stats.count <= 1:
+        return np.full(n_cols, 1 / n_cols)
+
+    range_vals = stats.max - stats.min
+    sum_sq = np.where(range_vals == 0, 0.0, np.diag(stats.comoment))
+    std_dev = np.sqrt(sum_sq / (stats.count - 1)) / (range_vals + EPSILON)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr_matrix = stats.comoment / np.sqrt(np.outer(sum_sq, sum_sq))
+    corr_matrix[~np.isfinite(corr_matrix)] = np.nan
+
+    c_j = std_dev * np.nansum(1 - corr_matrix, axis=0)
+    if c_j.sum() == 0:
+        return np.full(n_cols, 1 / n_cols)
+    return c_j / c_j.sum()
+
+def rank_new_alternative(matrix, stats, row, benefit_mask, v=0.5):
+    """
+    Menghitung bobot, nilai Q dan peringkat satu alternatif baru terhadap `matrix`
+    (dengan `stats` = criteria_stats(matrix)) tanpa menyalin atau menggabungkan matriks.
+    Peringkatnya sama dengan menjalankan CRITIC + VIKOR penuh pada data gabungan;
+    nilai Q yang sama persis ditempatkan setelah alternatif lama.
+    """
+    row = np.asarray(row, dtype=float)
+    benefit_mask = np.asarray(benefit_mask, dtype=bool)
+    new_stats = add_row_stats(stats, row)
+    weights = critic_weights_from_stats(new_stats)
+
+    min_vals = new_stats.min
+    range_vals = new_stats.max - min_vals
+    normalized_max = np.where(range_vals == 0, 0.0, (new_stats.max - min_vals) / (range_vals + EPSILON))
+    ideal_positive = np.where(benefit_mask, normalized_max, 0.0)
+
+    # Bobot dan batas min/max berubah karena baris baru, jadi alternatif lama dinilai ulang
+    # secara tervektorisasi (O(n x kriteria)) lalu dihitung berapa yang Q-nya <= Q baru.
+    # Matriks diproses per blok agar memori sementara per request tetap kecil.
+    def terms_of(values):
+        normalized = np.where(range_vals == 0, 0.0, (values - min_vals) / (range_vals + EPSILON))
+        return weights * np.abs(ideal_positive - normalized)
+
+    s_base = np.empty(len(matrix))
+    r_base = np.empty(len(matrix))
+    for start in range(0, len(matrix), BLOCK_ROWS):
+        block_terms = terms_of(matrix[start:start + BLOCK_ROWS])
+        s_base[start:start + BLOCK_ROWS] = block_terms.sum(axis=1)
+        r_base[start:start + BLOCK_ROWS] = block_terms.max(axis=1, initial=0.0)
+
+    new_terms = terms_of(row)
+    s_new, r_new = new_terms.sum(), new_terms.max(initial=0.0)
+
+    s_star, s_minus = s_base.min(initial=s_new), s_base.max(initial=s_new)
+    r_star, r_minus = r_base.min(initial=r_new), r_base.max(initial=r_new)
+
+    def q_of(s_values, r_values):
+        q_s_component = (s_values - s_star) / ((s_minus - s_star) + EPSILON)
+        q_r_component = (r_values - r_star) / ((r_minus - r_star) + EPSILON)
+        return v * q_s_component + (1 - v) * q_r_component
+
+    q_new = q_of(s_new, r_new)
+    rank = int(np.count_nonzero(q_of(s_base, r_base) <= q_new)) + 1
+    return WhatIfResult(weights, float(q_new), rank, len(matrix) + 1)
+
+
+# --- VIKOR per Blok Baris ---
+def vikor_block_sr(block, weights, min_vals, max_vals, benefit_mask):
+    """
+    S dan R VIKOR untuk sebagian baris, dengan min/max kolom dari seluruh kelompok (mis. dari
+    merge_stats). Hasilnya sama persis dengan baris yang sama di vikor_from_normalized() atas
+    seluruh kelompok, sehingga kelompok besar bisa dinilai per blok lalu Q dihitung dengan vikor_q().
+    """
+    range_vals = max_vals - min_vals
+    normalized = np.where(range_vals == 0, 0.0, (block - min_vals) / (range_vals + EPSILON))
+    normalized_max = np.where(range_vals == 0, 0.0, range_vals / (range_vals + EPSILON))
+    terms = weights * np.abs(np.where(benefit_mask, normalized_max, 0.0) - normalized)
+    return terms.sum(axis=1), terms.max(axis=1, initial=0.0)
+
+
+# --- Statistik Cukup Streaming ---
+class StreamingStatsAccumulator:
+    """
+    Mengakumulasi statistik cukup CRITIC dari blok-blok baris (mis. chunk CSV) dalam satu
+    lintasan. NaN dianggap nilai kosong yang baru diisi setelah seluruh data terbaca; momen silang
+    antara nilai teramati dan nilai kosong disimpan terpisah, sehingga finalize(fill_values)
+    menghasilkan statistik yang sama persis dengan criteria_stats() pada matriks yang sudah diisi.
+    Nilai digeser dengan rata-rata blok pertama agar momen mentah tidak kehilangan presisi.
+    """
+
+    def __init__(self, n_cols):
+        self.count = 0
+        self.shift = None
+        self.sums = np.zeros(n_cols)
+        self.products = np.zeros((n_cols, n_cols))     # sum x_i * x_k, keduanya teramati
+        self.cross_missing = np.zeros((n_cols, n_cols)) # sum x_i * [k kosong]
+        self.both_missing = np.zeros((n_cols, n_cols))  # jumlah baris dengan i dan k kosong
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+
+    def update(self, block):
+        block = np.asarray(block, dtype=float)
+        if len(block) == 0:
+            return
+        observed = ~np.isnan(block)
+        if self.shift is None:
+            counts = observed.sum(axis=0)
+            self.shift = np.divide(np.where(observed, block, 0.0).sum(axis=0), counts,
+                                   out=np.zeros(block.shape[1]), where=counts > 0)
+        shifted = np.where(observed, block - self.shift, 0.0)
+        missing = (~observed).astype(float)
+
+        self.count += len(block)
+        self.sums += shifted.sum(axis=0)
+        self.products += shifted.T @ shifted
+        self.cross_missing += shifted.T @ missing
+        self.both_missing += missing.T @ missing
+        np.minimum(self.min, np.where(observed, block, np.inf).min(axis=0), out=self.min)
+        np.maximum(self.max, np.where(observed, block, -np.inf).max(axis=0), out=self.max)
+
+    def finalize(self, fill_values):
+        """CriteriaStats setelah setiap nilai kosong kolom j diisi fill_values[j]."""
+        if self.count == 0:
+            return None
+        fill_values = np.asarray(fill_values, dtype=float)
+        n_missing = np.diag(self.both_missing)
+        fill_shifted = np.where(n_missing > 0, fill_values - self.shift, 0.0)
+
+        sums = self.sums + n_missing * fill_shifted
+        weighted = self.cross_missing * fill_shifted
+        products = self.products + weighted + weighted.T + self.both_missing * np.outer(fill_shifted, fill_shifted)
+        mean_shifted = sums / self.count
+        comoment = products - self.count * np.outer(mean_shifted, mean_shifted)
+
+        has_missing = n_missing > 0
+        min_vals = np.where(has_missing, np.fmin(self.min, fill_values), self.min)
+        max_vals = np.where(has_missing, np.fmax(self.max, fill_values), self.max)
+        return CriteriaStats(self.count, mean_shifted + self.shift, comoment, min_vals, max_vals)
+
+
+# --- Analisis Sensitivitas VIKOR ---
+# Jarak |ideal - nilai ter-normalisasi| per kriteria tidak bergantung pada bobot maupun v, jadi
+# dihitung sekali. Setiap skenario (vektor bobot x nilai v) lalu dinilai sekaligus dalam array
+# (skenario x alternatif): S lewat perkalian matriks, R lewat max pada broadcast, Q lewat broadcast v.
+
+SensitivityResult = namedtuple('SensitivityResult', ['mean_rank', 'min_rank', 'max_rank', 'top_k_probability', 'scenarios'])
+
+# Batas sel (skenario x alternatif) yang diproses per blok agar memori tetap terbatas
+SCENARIO_BLOCK_CELLS = 1 << 22
+
+def perturb_weights(weights, n_samples, spread=0.2, rng=None):
+    """
+    Sampel Monte-Carlo di sekitar vektor bobot: setiap bobot dikali exp(N(0, spread))
+    lalu dinormalisasi ulang agar jumlahnya 1. Mengembalikan array (n_samples x n_kriteria).
+    """
+    rng = np.random.default_rng(rng)
+    weights = np.asarray(weights, dtype=float)
+    samples = weights * np.exp(rng.normal(0.0, spread, (n_samples, len(weights))))
+    totals = samples.sum(axis=1, keepdims=True)
+    return np.divide(samples, totals, out=np.full_like(samples, 1 / max(len(weights), 1)), where=totals > 0)
+
+def vikor_q_scenarios(distances, weight_samples, v_values):
+    """
+    Nilai Q untuk setiap kombinasi (vektor bobot, v), berbentuk
+    (len(weight_samples) * len(v_values)) x alternatif; urutannya bobot dulu, lalu v.
+    """
+    weight_samples = np.atleast_2d(np.asarray(weight_samples, dtype=float))
+    v_values = np.asarray(v_values, dtype=float)
+
+    s_values = weight_samples @ distances.T
+    r_values = (weight_samples[:, None, :] * distances).max(axis=2, initial=0.0)
+
+    def scaled(values):
+        low = values.min(axis=1, keepdims=True)
+        return (values - low) / ((values.max(axis=1, keepdims=True) - low) + EPSILON)
+
+    q_values = v_values[None, :, None] * scaled(s_values)[:, None, :] + (1 - v_values)[None, :, None] * scaled(r_values)[:, None, :]
+    return q_values.reshape(-1, distances.shape[0])
+
+def vikor_sensitivity(normalized, weights, benefit_mask, v_values, n_perturbations=0, spread=0.2, top_k=10, seed=None):
+    """
+    Stabilitas peringkat VIKOR terhadap grid nilai v dan perturbasi bobot Monte-Carlo.
+    Skenario = (bobot asli + n_perturbations sampel bobot) x v_values. Peringkat tiap skenario
+    memakai aturan yang sama dengan rank_positions(). Mengembalikan SensitivityResult berisi
+    rata-rata/min/max peringkat dan peluang masuk top_k per alternatif.
+    """
+    n_rows = normalized.shape[0]
+    v_values = np.atleast_1d(np.asarray(v_values, dtype=float))
+    weight_samples = np.vstack([np.asarray(weights, dtype=float),
+                                perturb_weights(weights, n_perturbations, spread, seed)])
+    distances = vikor_distances(normalized, np.asarray(benefit_mask, dtype=bool))
+
+    rank_sum = np.zeros(n_rows)
+    rank_min = np.full(n_rows, n_rows, dtype=np.int64)
+    rank_max = np.zeros(n_rows, dtype=np.int64)
+    top_k_count = np.zeros(n_rows, dtype=np.int64)
+    ranks_template = np.arange(1, n_rows + 1, dtype=np.int64)
+
+    block = max(1, SCENARIO_BLOCK_CELLS // max(n_rows * len(v_values), 1))
+    for start in range(0, len(weight_samples), block):
+        q_values = vikor_q_scenarios(distances, weight_samples[start:start + block], v_values)
+        order = np.argsort(q_values, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, ranks_template[None, :], axis=1)
+
+        rank_sum += ranks.sum(axis=0)
+        np.minimum(rank_min, ranks.min(axis=0), out=rank_min)
+        np.maximum(rank_max, ranks.max(axis=0), out=rank_max)
+        top_k_count += np.count_nonzero(ranks <= top_k, axis=0)
+
+    n_scenarios = len(weight_samples) * len(v_values)
+    return SensitivityResult(rank_sum / n_scenarios, rank_min, rank_max, top_k_count / n_scenarios, n_scenarios)
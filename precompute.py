@@ -0,0 +1,282 @@
+"""
+Prakomputasi ranking CRITIC + VIKOR untuk semua kota sekaligus.
+
+Contoh:
+    python precompute.py --workers 4 --output rankings.csv
+
+Setiap kota (dan 'All') dihitung terpisah. Dengan workers > 1, pekerjaan dibagi ke process pool;
+matriks kriteria, posisi baris per kota, serta array S, R dan Q hasil diletakkan di shared memory
+sehingga worker tidak menerima salinan DataFrame lewat pickle. Kelompok yang lebih besar dari
+RANK_BLOCK_ROWS (biasanya 'All') dipecah per blok baris: statistik cukup CRITIC tiap blok digabung
+dengan mcdm.merge_stats(), lalu S dan R dinilai per blok, sehingga tidak ada satu tugas yang
+sebesar seluruh dataset.
+
+Process pool hanya dijalankan dari CLI ini dan benchmark.py, tidak saat modul app diimpor atau
+di jalur request: worker spawn mengimpor ulang skrip utama, dan fork dari thread request bisa
+mewarisi lock yang sedang dipegang thread lain. Agar hasilnya tetap dipakai web, CLI menyimpan
+semua ranking ke RANKINGS_FILE (ditandai hash SHA-256 CSV sumber, kriteria dan v); app memuatnya
+saat startup selama tanda itu masih cocok, lihat load_rankings().
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import mcdm
+from dataset import DATA_FILE, file_sha256
+
+CityRanking = namedtuple('CityRanking', ['positions', 'q', 'weights'])
+
+# Kelompok dengan baris valid lebih dari ini dihitung per blok baris oleh beberapa worker
+RANK_BLOCK_ROWS = 1 << 15
+
+# Tabel ranking hasil CLI yang dimuat app saat startup
+RANKINGS_FILE = 'tourism_data_updated.rankings.npz'
+RANKINGS_FORMAT_VERSION = 1
+
+
+# --- Shared Memory ---
+def _create_shared(array):
+    """Menyalin array ke blok shared memory baru; mengembalikan (SharedMemory, spesifikasi untuk worker)."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+def _attach_shared(spec):
+    name, shape, dtype = spec
+    # Worker dari process pool memakai resource tracker yang sama dengan proses induk,
+    # jadi blok ini tetap dibersihkan sekali oleh induk lewat unlink()
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+_worker_state = {}
+
+def _worker_arrays(specs):
+    """
+    Array shared memory untuk satu panggilan rank_all_cities(). Pool bisa dipakai ulang antar
+    panggilan; blok dari panggilan sebelumnya ditutup saat spesifikasinya berganti.
+    """
+    if _worker_state.get('specs') != specs:
+        previous = [shm for shm, _ in _worker_state.pop('arrays', {}).values()]
+        for shm in previous:
+            shm.close()
+        _worker_state['arrays'] = {key: _attach_shared(spec) for key, spec in specs.items()}
+        _worker_state['specs'] = specs
+    return {key: array for key, (_, array) in _worker_state['arrays'].items()}
+
+def _rank_group(specs, start, end, benefit_mask, v):
+    """Dijalankan di worker: ranking satu kelompok utuh, Q ditulis langsung ke shared memory."""
+    arrays = _worker_arrays(specs)
+    result = mcdm.critic_vikor(arrays['matrix'][arrays['positions'][start:end]], benefit_mask, v=v)
+    arrays['q'][start:end] = result.q
+    return result.weights
+
+def _block_stats(specs, start, end):
+    """Dijalankan di worker: statistik cukup CRITIC untuk satu blok baris."""
+    arrays = _worker_arrays(specs)
+    return mcdm.criteria_stats(arrays['matrix'][arrays['positions'][start:end]])
+
+def _block_sr(specs, start, end, weights, min_vals, max_vals, benefit_mask):
+    """Dijalankan di worker: S dan R VIKOR satu blok baris, ditulis langsung ke shared memory."""
+    arrays = _worker_arrays(specs)
+    block = arrays['matrix'][arrays['positions'][start:end]]
+    arrays['s'][start:end], arrays['r'][start:end] = mcdm.vikor_block_sr(block, weights, min_vals, max_vals, benefit_mask)
+
+
+# --- Ranking Semua Kota ---
+def ranking_pool(workers):
+    """Process pool untuk rank_all_cities(); buat sekali lalu pakai ulang untuk banyak panggilan."""
+    return ProcessPoolExecutor(max_workers=workers)
+
+def _can_start_pool():
+    # Hanya thread utama proses induk yang membuat process pool (lihat docstring modul)
+    return multiprocessing.parent_process() is None and threading.current_thread() is threading.main_thread()
+
+def rank_all_cities(store, criteria, benefit_criteria, v=0.5, workers=1, pool=None, block_rows=RANK_BLOCK_ROWS):
+    """
+    CRITIC + VIKOR untuk setiap kota di store.city_rows (termasuk 'All') pada DatasetStore.
+    Mengembalikan dict kota -> CityRanking(positions, q, weights). Kota dengan kurang dari 2 baris
+    valid tidak disertakan.
+
+    Tanpa `pool` dan dengan workers <= 1 (atau jika semua baris muat dalam satu blok) semuanya
+    dihitung di proses ini, sama persis seperti menghitung tiap kota satu per satu. Dengan `pool` (lihat ranking_pool()) atau workers > 1,
+    kelompok besar dihitung per blok; bobot CRITIC-nya berasal dari statistik cukup gabungan dan
+    bisa berbeda dari jalur serial sebatas pembulatan floating point. Di luar thread utama
+    proses induk, process pool baru tidak dibuat dan perhitungan kembali ke jalur serial.
+    """
+    if store.matrix is None or any(c not in store.criteria for c in criteria):
+        return {}
+    matrix = store.matrix
+    if tuple(criteria) != store.criteria:
+        matrix = np.ascontiguousarray(matrix[:, [store.criteria.index(c) for c in criteria]])
+    benefit_mask = np.isin(criteria, benefit_criteria)
+
+    # Semua grup diletakkan berurutan dalam satu array posisi; grup terbesar dikerjakan lebih dulu
+    groups = {city: rows[store.valid_rows[rows]] for city, rows in store.city_rows.items()}
+    groups = {city: rows for city, rows in groups.items() if len(rows) >= 2}
+    cities = sorted(groups, key=lambda city: len(groups[city]), reverse=True)
+    offsets = np.concatenate([[0], np.cumsum([len(groups[city]) for city in cities])]).astype(np.int64)
+    all_positions = np.concatenate([groups[city] for city in cities]) if cities else np.empty(0, dtype=np.intp)
+    tasks = [(city, int(offsets[i]), int(offsets[i + 1])) for i, city in enumerate(cities)]
+
+    if pool is None and (workers <= 1 or len(all_positions) <= block_rows or not _can_start_pool()):
+        results = {}
+        for city, start, end in tasks:
+            positions = all_positions[start:end]
+            result = mcdm.critic_vikor(matrix[positions], benefit_mask, v=v)
+            results[city] = CityRanking(positions, result.q, result.weights)
+        return results
+
+    if pool is None:
+        with ranking_pool(workers) as pool:
+            return _rank_all_cities_parallel(pool, matrix, all_positions, tasks, benefit_mask, v, block_rows)
+    return _rank_all_cities_parallel(pool, matrix, all_positions, tasks, benefit_mask, v, block_rows)
+
+def _rank_all_cities_parallel(pool, matrix, all_positions, tasks, benefit_mask, v, block_rows):
+    blocks = []
+    try:
+        specs = {}
+        for key, array in (('matrix', matrix),
+                           ('positions', all_positions),
+                           ('q', np.zeros(len(all_positions))),
+                           ('s', np.zeros(len(all_positions))),
+                           ('r', np.zeros(len(all_positions)))):
+            shm, specs[key] = _create_shared(array)
+            blocks.append(shm)
+        shared = {key: np.ndarray(spec[1], dtype=np.dtype(spec[2]), buffer=shm.buf)
+                  for (key, spec), shm in zip(specs.items(), blocks)}
+
+        # Kelompok kecil: satu tugas per kota. Kelompok besar: tahap 1, statistik per blok.
+        whole, split = {}, {}
+        for city, start, end in tasks:
+            if end - start > block_rows:
+                ranges = [(block, min(block + block_rows, end)) for block in range(start, end, block_rows)]
+                split[city] = (start, end, ranges, [pool.submit(_block_stats, specs, *block) for block in ranges])
+            else:
+                whole[city] = (start, end, pool.submit(_rank_group, specs, start, end, benefit_mask, v))
+
+        # Tahap 2: bobot dari statistik gabungan, lalu S dan R per blok
+        pending = {}
+        for city, (start, end, ranges, stats_futures) in split.items():
+            stats = stats_futures[0].result()
+            for future in stats_futures[1:]:
+                stats = mcdm.merge_stats(stats, future.result())
+            weights = mcdm.critic_weights_from_stats(stats)
+            pending[city] = (start, end, weights, [pool.submit(_block_sr, specs, *block, weights, stats.min, stats.max, benefit_mask)
+                                                   for block in ranges])
+
+        results = {}
+        for city, (start, end, weights, futures) in pending.items():
+            for future in futures:
+                future.result()
+            q = mcdm.vikor_q(shared['s'][start:end], shared['r'][start:end], v)
+            results[city] = CityRanking(all_positions[start:end], q, weights)
+        for city, (start, end, future) in whole.items():
+            results[city] = CityRanking(all_positions[start:end], shared['q'][start:end].copy(), future.result())
+        del shared
+        return {city: results[city] for city, _, _ in tasks}
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+def ranking_table(store, rankings):
+    """
+    Satu tabel ranking (DataFrame) dari hasil rank_all_cities(): satu baris per (pilihan kota,
+    destinasi), terurut per pilihan lalu peringkat. Kolom identitas diambil dari store.columns.
+    """
+    frames = []
+    for choice, ranking in rankings.items():
+        order = np.argsort(ranking.q, kind='stable')
+        rows = ranking.positions[order]
+        frame = {'City_Choice': np.full(len(rows), choice, dtype=object), 'Rank': np.arange(1, len(rows) + 1)}
+        for col in ('Place_Id', 'Place_Name', 'City'):
+            if col in store.columns:
+                frame[col] = store.columns[col][rows]
+        frame['VIKOR_Score'] = ranking.q[order]
+        frames.append(pd.DataFrame(frame))
+    if not frames:
+        return pd.DataFrame(columns=['City_Choice', 'Rank', 'Place_Id', 'Place_Name', 'City', 'VIKOR_Score'])
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- Tabel Ranking Tersimpan ---
+def save_rankings(rankings, criteria, benefit_criteria, v, path=RANKINGS_FILE, source_path=DATA_FILE):
+    """Menyimpan hasil rank_all_cities() beserta tanda dataset dan parameter yang menghasilkannya."""
+    cities = list(rankings)
+    lengths = [len(rankings[city].positions) for city in cities]
+    np.savez(
+        path,
+        format_version=RANKINGS_FORMAT_VERSION,
+        source_size=os.path.getsize(source_path),
+        source_sha256=file_sha256(source_path),
+        criteria=np.array(criteria, dtype=str),
+        benefit_criteria=np.array(benefit_criteria, dtype=str),
+        v=v,
+        cities=np.array(cities, dtype=str),
+        offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        positions=np.concatenate([rankings[city].positions for city in cities]) if cities else np.empty(0, dtype=np.intp),
+        q=np.concatenate([rankings[city].q for city in cities]) if cities else np.empty(0),
+        weights=np.array([rankings[city].weights for city in cities]).reshape(len(cities), len(criteria)),
+    )
+
+def load_rankings(store, criteria, benefit_criteria, v, path=RANKINGS_FILE, source_path=DATA_FILE):
+    """
+    Hasil rank_all_cities() yang tersimpan untuk `store`, atau None jika file tidak ada, dibuat
+    dari isi CSV lain, dengan kriteria/v lain, atau tidak cocok dengan baris dan kota di store.
+    `store` harus dimuat dari `source_path` (bukan data sintetis dari install_dataset()).
+    """
+    try:
+        with np.load(path) as saved:
+            if (int(saved['format_version']) != RANKINGS_FORMAT_VERSION
+                    or saved['criteria'].tolist() != list(criteria)
+                    or saved['benefit_criteria'].tolist() != list(benefit_criteria)
+                    or float(saved['v']) != v):
+                return None
+            if int(saved['source_size']) != os.path.getsize(source_path) or str(saved['source_sha256']) != file_sha256(source_path):
+                return None
+            cities, offsets = saved['cities'].tolist(), saved['offsets']
+            positions, q, weights = saved['positions'], saved['q'], saved['weights']
+    except (OSError, ValueError, KeyError):
+        return None
+    if any(city not in store.city_rows for city in cities) or (len(positions) and positions.max() >= store.n_rows):
+        return None
+    return {city: CityRanking(positions[offsets[i]:offsets[i + 1]], q[offsets[i]:offsets[i + 1]], weights[i])
+            for i, city in enumerate(cities)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute DESTINA rankings for every city.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (1 = serial).")
+    parser.add_argument('--output', default='rankings.csv', help="Where to write the ranking table (CSV).")
+    parser.add_argument('--rankings-file', default=RANKINGS_FILE, help="Where to save the rankings the app loads at startup.")
+    args = parser.parse_args(argv)
+
+    # Diimpor di sini agar --help tidak ikut memuat dataset; cache app tidak dipanaskan secara serial
+    # karena semua ranking dihitung di bawah ini lewat process pool
+    os.environ['DESTINA_WARM_CACHE'] = '0'
+    import app as app_module
+
+    started = time.perf_counter()
+    rankings = rank_all_cities(app_module.DATASET_STORE, app_module.CRITERIA, app_module.BENEFIT_CRITERIA,
+                               app_module.VIKOR_V, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    rankings = {city: rankings[city] for city in app_module.CITIES if city in rankings}
+    table = ranking_table(app_module.DATASET_STORE, rankings)
+    table.to_csv(args.output, index=False)
+    save_rankings(rankings, app_module.CRITERIA, app_module.BENEFIT_CRITERIA, app_module.VIKOR_V, path=args.rankings_file)
+    print(f"Ranking table for {len(rankings)} city choices ({len(table)} rows) written to '{args.output}' and "
+          f"'{args.rankings_file}' ({args.workers} workers, ranking took {elapsed * 1000:.1f} ms).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
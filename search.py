@@ -0,0 +1,160 @@
+import os
+import re
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from dataset import COORDINATES_FILE, file_sha256
+
+# --- Indeks Teks (Inverted Index + BM25) ---
+# Nama, kategori dan deskripsi setiap destinasi di tourism_with_id.csv dipecah menjadi token,
+# lalu disimpan sebagai posting list per term dalam format CSR (offsets + doc_ids + term_freqs).
+# Indeks dibangun dan disimpan ke SEARCH_INDEX_FILE hanya oleh langkah build (python dataset.py);
+# saat startup file itu dibaca selama ukuran dan hash SHA-256 CSV sumber masih sama, jika tidak
+# indeks dibangun di memori tanpa menulis apa pun. Query hanya menyentuh posting list term yang
+# dicari, tanpa memindai teks per request.
+
+SEARCH_SOURCE_FILE = COORDINATES_FILE
+SEARCH_INDEX_FILE = 'tourism_with_id.search.npz'
+SEARCH_INDEX_FORMAT_VERSION = 1
+TEXT_COLUMNS = ['Place_Name', 'Category', 'Description']
+
+# Parameter BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Kata umum bahasa Indonesia yang tidak membantu pencarian
+STOPWORDS = frozenset("""
+    ada adalah agar akan atau bagi bahwa banyak bisa dalam dan dapat dari dengan di hingga ini itu
+    juga ke karena kami kita lagi lain lebih maka masih mereka namun oleh pada para saat sangat
+    sebagai sebuah secara sehingga sejak selain semua serta setiap sudah tak tetapi tersebut tidak
+    untuk yaitu yang
+""".split())
+
+SearchIndex = namedtuple('SearchIndex', ['vocabulary', 'offsets', 'doc_ids', 'term_freqs', 'doc_lengths', 'place_ids', 'idf', 'avg_doc_length'])
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text):
+    """Token huruf kecil tanpa stopword dan token satu karakter."""
+    return [token for token in _TOKEN_PATTERN.findall(str(text).lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+def _bm25_idf(doc_freqs, n_docs):
+    return np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+def build_search_index(place_ids, texts):
+    """Membangun SearchIndex dari Place_Id dan teks dokumen yang sejajar."""
+    postings = {}
+    doc_lengths = np.zeros(len(texts), dtype=np.int32)
+    for doc_id, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        doc_lengths[doc_id] = sum(counts.values())
+        for term, count in counts.items():
+            postings.setdefault(term, []).append((doc_id, count))
+
+    terms = sorted(postings)
+    lengths = np.array([len(postings[term]) for term in terms], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    pairs = np.array([pair for term in terms for pair in postings[term]], dtype=np.int64).reshape(-1, 2)
+    return _make_index(
+        terms, offsets, pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.int32),
+        doc_lengths, np.asarray(place_ids, dtype=np.int64),
+    )
+
+def _make_index(terms, offsets, doc_ids, term_freqs, doc_lengths, place_ids):
+    n_docs = len(doc_lengths)
+    return SearchIndex(
+        vocabulary={term: term_id for term_id, term in enumerate(terms)},
+        offsets=offsets,
+        doc_ids=doc_ids,
+        term_freqs=term_freqs,
+        doc_lengths=doc_lengths,
+        place_ids=place_ids,
+        idf=_bm25_idf(np.diff(offsets), n_docs),
+        avg_doc_length=float(doc_lengths.mean()) if n_docs and doc_lengths.any() else 1.0,
+    )
+
+def search(index, query):
+    """
+    Skor BM25 untuk query (semantik OR antar term). Mengembalikan (place_ids, skor) untuk setiap
+    destinasi yang memuat minimal satu term, terurut dari skor tertinggi. Biayanya sebanding
+    dengan panjang posting list term pada query, bukan jumlah dokumen.
+    """
+    doc_parts, score_parts = [], []
+    for term in set(tokenize(query)):
+        term_id = index.vocabulary.get(term)
+        if term_id is None:
+            continue
+        start, end = index.offsets[term_id], index.offsets[term_id + 1]
+        doc_ids = index.doc_ids[start:end]
+        term_freqs = index.term_freqs[start:end]
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * index.doc_lengths[doc_ids] / index.avg_doc_length)
+        doc_parts.append(doc_ids)
+        score_parts.append(index.idf[term_id] * term_freqs * (BM25_K1 + 1) / (term_freqs + length_norm))
+
+    if not doc_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    doc_ids, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+    scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+    order = np.argsort(-scores, kind='stable')
+    return index.place_ids[doc_ids[order]], scores[order]
+
+
+# --- Penyimpanan Indeks ---
+def save_search_index(index, path=SEARCH_INDEX_FILE, source_path=SEARCH_SOURCE_FILE):
+    terms = np.array(sorted(index.vocabulary, key=index.vocabulary.get), dtype=str)
+    np.savez_compressed(
+        path,
+        format_version=SEARCH_INDEX_FORMAT_VERSION,
+        source_size=os.path.getsize(source_path),
+        source_sha256=file_sha256(source_path),
+        terms=terms,
+        offsets=index.offsets,
+        doc_ids=index.doc_ids,
+        term_freqs=index.term_freqs,
+        doc_lengths=index.doc_lengths,
+        place_ids=index.place_ids,
+    )
+
+def _read_saved_index(path, source_path):
+    """SearchIndex dari file jika ada dan dibuat dari isi CSV yang sama, selain itu None."""
+    try:
+        with np.load(path) as saved:
+            if int(saved['format_version']) != SEARCH_INDEX_FORMAT_VERSION:
+                return None
+            if int(saved['source_size']) != os.path.getsize(source_path) or str(saved['source_sha256']) != file_sha256(source_path):
+                return None
+            return _make_index(saved['terms'].tolist(), saved['offsets'], saved['doc_ids'], saved['term_freqs'],
+                               saved['doc_lengths'], saved['place_ids'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+def build_search_index_from_csv(source_path=SEARCH_SOURCE_FILE):
+    columns = pd.read_csv(source_path, usecols=lambda col: col in ['Place_Id'] + TEXT_COLUMNS)
+    texts = columns.reindex(columns=TEXT_COLUMNS).fillna('').astype(str).agg(' '.join, axis=1)
+    return build_search_index(columns['Place_Id'].to_numpy(), texts.tolist())
+
+def load_search_index(path=SEARCH_INDEX_FILE, source_path=SEARCH_SOURCE_FILE):
+    """
+    Memuat indeks yang tersimpan jika masih segar; jika tidak, membangunnya dari CSV di memori
+    saja (tidak ada file yang ditulis saat runtime). None jika CSV sumber tidak bisa dibaca.
+    """
+    index = _read_saved_index(path, source_path)
+    if index is not None:
+        return index
+    try:
+        index = build_search_index_from_csv(source_path)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Search index could not be built from '{source_path}': {e}")
+        return None
+    print(f"WARNING: Search index '{path}' is missing or stale, built it in memory. Run 'python dataset.py' to save it.")
+    return index
+
+def build_search_index_file(path=SEARCH_INDEX_FILE, source_path=SEARCH_SOURCE_FILE):
+    """Langkah build: membangun indeks dari CSV dan menyimpannya ke `path`."""
+    index = build_search_index_from_csv(source_path)
+    save_search_index(index, path, source_path)
+    print(f"Search index '{path}' berhasil dibuat ({len(index.place_ids)} documents, {len(index.vocabulary)} terms).")
+    return index
@@ -0,0 +1,78 @@
+"""
+Uji properti: versi array di helpers.py harus menghasilkan teks yang sama persis dengan
+helper skalar (atau format lama di app.py) untuk setiap elemen.
+
+Masukan sengaja berupa float Python: round() pada np.float64 membulatkan dengan cara NumPy,
+bukan cara Python, sehingga format_angka_tampilan(np.float64(...)) bisa berbeda di nilai tengah.
+"""
+import random
+
+import pytest
+
+from helpers import format_angka_tampilan, format_angka_tampilan_batch, format_rupiah_batch, hitung_bintang_rating
+
+SEED = 20240601
+N_RANDOM = 5000
+
+
+def _random_floats(rng, n):
+    """Campuran nilai acak lintas skala, nilai tengah pembulatan, bilangan bulat dan angka sangat kecil."""
+    values = []
+    for _ in range(n):
+        kind = rng.randrange(5)
+        sign = rng.choice((-1.0, 1.0))
+        if kind == 0:
+            values.append(sign * 10 ** rng.uniform(-12, 9))
+        elif kind == 1: # Tepat di tengah dua nilai pembulatan, mis. 0.00125 atau 2.5
+            digits = rng.randrange(0, 8)
+            values.append(sign * (rng.randrange(0, 10 ** 6) + 0.5) / 10 ** digits)
+        elif kind == 2:
+            values.append(sign * float(rng.randrange(0, 10 ** 7)))
+        elif kind == 3: # Di sekitar ambang nol (1e-9) dan presisi tambahan angka kecil
+            values.append(sign * rng.uniform(0, 5e-6))
+        else:
+            values.append(rng.uniform(0, 1))
+    values += [0.0, -0.0, 1e-9, -1e-9, 0.5, 1.5, 2.5, 0.00005, 0.000005, 0.0000005, 0.99995, 1e-10]
+    assert all(type(value) is float for value in values)
+    return values
+
+
+@pytest.fixture(scope='module')
+def floats():
+    return _random_floats(random.Random(SEED), N_RANDOM)
+
+
+@pytest.mark.parametrize('maks_desimal', [0, 1, 2, 4, 6])
+def test_format_angka_tampilan_batch_matches_scalar(floats, maks_desimal):
+    expected = [format_angka_tampilan(value, maks_desimal=maks_desimal) for value in floats]
+    actual = format_angka_tampilan_batch(floats, maks_desimal=maks_desimal).tolist()
+    mismatches = [(value, e, a) for value, e, a in zip(floats, expected, actual) if e != a]
+    assert not mismatches, mismatches[:10]
+
+
+def test_format_rupiah_batch_matches_scalar_format():
+    rng = random.Random(SEED)
+    prices = [rng.choice((-1.0, 1.0)) * rng.uniform(0, 10 ** rng.randrange(0, 13)) for _ in range(N_RANDOM)]
+    prices += [0.0, -0.0, 0.999, -0.999, 999.0, 1000.0, 999999.5, 1e12]
+    expected = [f"Rp {int(price):,.0f}".replace(',', '.') for price in prices]
+    assert format_rupiah_batch(prices).tolist() == expected
+
+
+def _bintang_skalar(rating):
+    # Logika lama di app.py, per nilai rating
+    full_stars = int(rating)
+    half_star = 0
+    if (rating - full_stars) >= 0.75:
+        full_stars += 1
+    elif (rating - full_stars) >= 0.25:
+        half_star = 1
+    return full_stars, half_star, 5 - full_stars - half_star
+
+
+def test_hitung_bintang_rating_matches_scalar():
+    rng = random.Random(SEED)
+    ratings = [rng.uniform(0, 5) for _ in range(N_RANDOM)]
+    ratings += [k + fraction for k in range(5) for fraction in (0.0, 0.25, 0.75, 0.2499999, 0.7499999)] + [5.0]
+    full, half, empty = hitung_bintang_rating(ratings)
+    assert list(zip(full.tolist(), half.tolist(), empty.tolist())) == [_bintang_skalar(rating) for rating in ratings]
+